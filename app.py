@@ -1,651 +1,22 @@
 # -*- coding: utf-8 -*-
-import re, base64, io
-from io import BytesIO
-from datetime import datetime, date, time, timezone
-from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+import tempfile
+from datetime import datetime, date, time, timedelta
 
 import streamlit as st
-import qrcode
-from qrcode.constants import ERROR_CORRECT_M
-from PIL import Image
-from barcode import Code128
-from barcode.writer import ImageWriter
-from pypdf import PdfReader, PdfWriter
+
+from labelkit import bulk, cache, metrics, output, pdfmeta, raster, sellers, sheet, stamp, theme
+from labelkit import (
+    WIDTH_IN, HEIGHT_IN, DPI, sanitize, render_code128,
+    clean_vat, fmt2, iso_utc, build_zatca_base64, render_qr, split_vat, split_csv,
+    split_halalas, format_halalas, to_halalas,
+    write_meta, parse_display_dt,
+)
 
 # ================= إعداد عام + تنسيق =================
 st.set_page_config(page_title="حاسبة + ZATCA + Code128 + PDF Metadata", page_icon="💰", layout="wide")
 
-# إضافة CSS للتصميم العصري مع الأيقونات التفاعلية
-st.markdown("""
-<link href="https://fonts.googleapis.com/css2?family=Cairo:wght@400;600;700&display=swap" rel="stylesheet">
-<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-<style>
-    /* تحسينات للخط العربي */
-    body {
-        font-family: 'Cairo', 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-        font-feature-settings: "kern" 1, "liga" 1, "calt" 1;
-        text-rendering: optimizeLegibility;
-        -webkit-font-smoothing: antialiased;
-        -moz-osx-font-smoothing: grayscale;
-        background: linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%);
-        color: #ffffff;
-    }
-    
-    /* متغيرات CSS للألوان والأبعاد */
-    :root {
-        --primary-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        --secondary-gradient: linear-gradient(45deg, #f093fb 0%, #f5576c 100%);
-        --success-gradient: linear-gradient(45deg, #4facfe 0%, #00f2fe 100%);
-        --glass-bg: rgba(255, 255, 255, 0.1);
-        --glass-border: rgba(255, 255, 255, 0.2);
-        --shadow-light: 0 8px 32px rgba(31, 38, 135, 0.37);
-        --shadow-heavy: 0 20px 40px rgba(0, 0, 0, 0.2);
-        --border-radius: 16px;
-        --transition-fast: 0.2s ease;
-        --transition-normal: 0.3s ease;
-        --transition-slow: 0.5s ease;
-    }
-    
-    /* تحسينات Glass Morphism */
-    .glass-effect {
-        background: var(--glass-bg);
-        backdrop-filter: blur(20px);
-        -webkit-backdrop-filter: blur(20px);
-        border: 1px solid var(--glass-border);
-        box-shadow: var(--shadow-light);
-    }
-    
-    /* تأثيرات الهوفر المحسنة */
-    .hover-lift {
-        transition: transform var(--transition-normal), box-shadow var(--transition-normal);
-    }
-    
-    .hover-lift:hover {
-        transform: translateY(-8px) scale(1.02);
-        box-shadow: var(--shadow-heavy);
-    }
-    
-    /* أنيميشن النبض المحسن */
-    .pulse-glow {
-        animation: pulseGlow 2s ease-in-out infinite;
-    }
-    
-    @keyframes pulseGlow {
-        0%, 100% {
-            box-shadow: 0 0 20px rgba(255, 255, 255, 0.3);
-        }
-        50% {
-            box-shadow: 0 0 40px rgba(255, 255, 255, 0.6);
-        }
-    }
-    
-    /* تأثير الموج للأزرار */
-    .ripple {
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .ripple:before {
-        content: '';
-        position: absolute;
-        top: 50%;
-        left: 50%;
-        width: 0;
-        height: 0;
-        border-radius: 50%;
-        background: rgba(255, 255, 255, 0.6);
-        transform: translate(-50%, -50%);
-        transition: width 0.6s, height 0.6s;
-    }
-    
-    .ripple:active:before {
-        width: 300px;
-        height: 300px;
-    }
-    
-    /* التصميم العام */
-    .main-header {
-        background: var(--primary-gradient);
-        padding: 2rem;
-        border-radius: var(--border-radius);
-        margin-bottom: 2rem;
-        box-shadow: var(--shadow-heavy);
-        text-align: center;
-        color: white;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .main-header::before {
-        content: "";
-        position: absolute;
-        top: -50%;
-        right: -50%;
-        width: 200%;
-        height: 200%;
-        background: radial-gradient(circle, rgba(255,255,255,0.2) 0%, rgba(255,255,255,0) 70%);
-        transform: rotate(45deg);
-        z-index: 1;
-    }
-    
-    .main-header h1 {
-        font-size: 2.5rem;
-        margin: 0;
-        position: relative;
-        z-index: 2;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.2);
-    }
-    
-    .main-header .subtitle {
-        font-size: 1.2rem;
-        margin-top: 0.5rem;
-        opacity: 0.9;
-        position: relative;
-        z-index: 2;
-    }
-    
-    h1, h2, h3 {
-        text-align: center;
-        font-weight: 700;
-        color: #ffffff;
-        margin-bottom: 1.5rem;
-        position: relative;
-    }
-    
-    h1::after, h2::after, h3::after {
-        content: "";
-        position: absolute;
-        bottom: -10px;
-        left: 50%;
-        transform: translateX(-50%);
-        width: 80px;
-        height: 3px;
-        background: var(--secondary-gradient);
-        border-radius: 3px;
-    }
-    
-    .block-container {
-        padding-top: 1rem;
-    }
-    
-    /* تصميم البطاقات */
-    .card {
-        background: var(--glass-bg);
-        backdrop-filter: blur(20px);
-        -webkit-backdrop-filter: blur(20px);
-        border: 1px solid var(--glass-border);
-        border-radius: var(--border-radius);
-        padding: 1.5rem;
-        box-shadow: var(--shadow-light);
-        margin-bottom: 1.5rem;
-        transition: var(--transition-normal);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .card::before {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        width: 5px;
-        height: 100%;
-        background: var(--secondary-gradient);
-        transition: var(--transition-normal);
-    }
-    
-    .card:hover {
-        transform: translateY(-5px);
-        box-shadow: var(--shadow-heavy);
-    }
-    
-    .card:hover::before {
-        width: 100%;
-        opacity: 0.1;
-    }
-    
-    /* تصميم الأزرار */
-    div[data-testid="stButton"] > button {
-        background: var(--primary-gradient);
-        color: white;
-        border: none;
-        border-radius: 50px;
-        padding: 0.6rem 1.5rem;
-        font-weight: 600;
-        transition: var(--transition-normal);
-        box-shadow: var(--shadow-light);
-        position: relative;
-        overflow: hidden;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        gap: 8px;
-    }
-    
-    div[data-testid="stButton"] > button::before {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: rgba(255,255,255,0.2);
-        transition: var(--transition-normal);
-    }
-    
-    div[data-testid="stButton"] > button:hover::before {
-        left: 100%;
-    }
-    
-    div[data-testid="stButton"] > button:hover {
-        transform: translateY(-3px);
-        box-shadow: var(--shadow-heavy);
-    }
-    
-    div[data-testid="stButton"] > button:active {
-        transform: translateY(1px);
-    }
-    
-    /* تصميم حقول الإدخال */
-    div[data-testid="stTextInput"] > div > div > input {
-        background: var(--glass-bg);
-        backdrop-filter: blur(10px);
-        -webkit-backdrop-filter: blur(10px);
-        border: 1px solid var(--glass-border);
-        border-radius: 10px;
-        padding: 0.8rem 1rem;
-        transition: var(--transition-normal);
-        font-size: 1rem;
-        color: #ffffff;
-    }
-    
-    div[data-testid="stTextInput"] > div > div > input:focus {
-        border-color: #667eea;
-        box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.3);
-    }
-    
-    /* تغيير لون الرقم الضريبي للأخضر عند بلوغ 15 رقم */
-    .vat-valid {
-        color: #4ade80 !important;
-        font-weight: 600;
-    }
-    
-    div[data-testid="stNumberInput"] > div > div > input {
-        background: var(--glass-bg);
-        backdrop-filter: blur(10px);
-        -webkit-backdrop-filter: blur(10px);
-        border: 1px solid var(--glass-border);
-        border-radius: 10px;
-        padding: 0.8rem 1rem;
-        transition: var(--transition-normal);
-        font-size: 1rem;
-        color: #ffffff;
-    }
-    
-    div[data-testid="stNumberInput"] > div > div > input:focus {
-        border-color: #667eea;
-        box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.3);
-    }
-    
-    div[data-testid="stDateInput"] > div > div > input {
-        background: var(--glass-bg);
-        backdrop-filter: blur(10px);
-        -webkit-backdrop-filter: blur(10px);
-        border: 1px solid var(--glass-border);
-        border-radius: 10px;
-        padding: 0.8rem 1rem;
-        transition: var(--transition-normal);
-        font-size: 1rem;
-        color: #ffffff;
-    }
-    
-    div[data-testid="stDateInput"] > div > div > input:focus {
-        border-color: #667eea;
-        box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.3);
-    }
-    
-    div[data-testid="stTimeInput"] > div > div > input {
-        background: var(--glass-bg);
-        backdrop-filter: blur(10px);
-        -webkit-backdrop-filter: blur(10px);
-        border: 1px solid var(--glass-border);
-        border-radius: 10px;
-        padding: 0.8rem 1rem;
-        transition: var(--transition-normal);
-        font-size: 1rem;
-        color: #ffffff;
-    }
-    
-    div[data-testid="stTimeInput"] > div > div > input:focus {
-        border-color: #667eea;
-        box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.3);
-    }
-    
-    /* تصميم الأيقونات التفاعلية */
-    .icon-container {
-        display: flex;
-        justify-content: center;
-        margin: 1.5rem 0;
-    }
-    
-    .icon-item {
-        display: flex;
-        flex-direction: column;
-        align-items: center;
-        margin: 0 1.5rem;
-        cursor: pointer;
-        transition: var(--transition-normal);
-    }
-    
-    .icon-item:hover {
-        transform: translateY(-5px);
-    }
-    
-    .icon-item i {
-        font-size: 2.5rem;
-        color: #667eea;
-        margin-bottom: 0.5rem;
-        transition: var(--transition-normal);
-    }
-    
-    .icon-item:hover i {
-        color: #f093fb;
-        transform: scale(1.2);
-    }
-    
-    .icon-item span {
-        font-size: 0.9rem;
-        font-weight: 600;
-        color: #ffffff;
-    }
-    
-    /* تصميم رسائل النجاح والخطأ */
-    div[data-testid="stException"] {
-        background-color: rgba(244, 67, 54, 0.2);
-        border-left: 5px solid #f44336;
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 1rem 0;
-        color: #ffffff;
-    }
-    
-    div[data-testid="stSuccess"] {
-        background-color: rgba(76, 175, 80, 0.2);
-        border-left: 5px solid #4caf50;
-        padding: 1rem;
-        border-radius: 5px;
-        margin: 1rem 0;
-        color: #ffffff;
-    }
-    
-    /* تصميم شريط التقدم */
-    .progress-container {
-        height: 8px;
-        background: rgba(255, 255, 255, 0.1);
-        border-radius: 5px;
-        margin: 1.5rem 0;
-        overflow: hidden;
-        position: relative;
-    }
-    
-    .progress-bar {
-        height: 100%;
-        background: var(--success-gradient);
-        border-radius: 5px;
-        width: 0%;
-        transition: width 1s ease-in-out;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .progress-bar::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(255, 255, 255, 0.4), transparent);
-        animation: shimmer 2s infinite;
-    }
-    
-    @keyframes shimmer {
-        0% { left: -100%; }
-        100% { left: 100%; }
-    }
-    
-    /* تصميم عناصر التبويب */
-    .tab-container {
-        display: flex;
-        justify-content: center;
-        margin-bottom: 2rem;
-    }
-    
-    .tab-item {
-        padding: 0.8rem 1.5rem;
-        margin: 0 0.5rem;
-        background: var(--glass-bg);
-        backdrop-filter: blur(10px);
-        -webkit-backdrop-filter: blur(10px);
-        border: 1px solid var(--glass-border);
-        border-radius: 50px;
-        cursor: pointer;
-        transition: var(--transition-normal);
-        box-shadow: var(--shadow-light);
-        font-weight: 600;
-        color: #ffffff;
-    }
-    
-    .tab-item:hover {
-        background: var(--secondary-gradient);
-        color: white;
-        transform: translateY(-3px);
-        box-shadow: var(--shadow-heavy);
-    }
-    
-    .tab-item.active {
-        background: var(--primary-gradient);
-        color: white;
-    }
-    
-    /* تصميم الصور */
-    .image-container {
-        display: flex;
-        justify-content: center;
-        margin: 1.5rem 0;
-    }
-    
-    .image-container img {
-        max-width: 100%;
-        border-radius: 10px;
-        box-shadow: var(--shadow-heavy);
-        transition: var(--transition-normal);
-    }
-    
-    .image-container img:hover {
-        transform: scale(1.02);
-        box-shadow: 0 8px 16px rgba(0,0,0,0.3);
-    }
-    
-    /* تصميم الفوتر */
-    .footer {
-        text-align: center;
-        margin-top: 3rem;
-        padding: 1.5rem;
-        color: #ffffff;
-        font-size: 0.9rem;
-    }
-    
-    /* تصميم متجاوب */
-    @media (max-width: 768px) {
-        .main-header h1 {
-            font-size: 2rem;
-        }
-        
-        .icon-item {
-            margin: 0 0.8rem;
-        }
-        
-        .icon-item i {
-            font-size: 2rem;
-        }
-    }
-    
-    /* تأثير الجسيمات للخلفية */
-    .particles {
-        position: fixed;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        pointer-events: none;
-        z-index: -1;
-    }
-    
-    .particle {
-        position: absolute;
-        width: 2px;
-        height: 2px;
-        background: rgba(255, 255, 255, 0.3);
-        border-radius: 50%;
-        animation: float 6s ease-in-out infinite;
-    }
-    
-    @keyframes float {
-        0%, 100% {
-            transform: translateY(0px) rotate(0deg);
-            opacity: 0.3;
-        }
-        50% {
-            transform: translateY(-20px) rotate(180deg);
-            opacity: 0.8;
-        }
-    }
-    
-    /* تأثير الموج عند الضغط */
-    .ripple-effect {
-        position: absolute;
-        border-radius: 50%;
-        background: rgba(255, 255, 255, 0.6);
-        transform: scale(0);
-        animation: ripple-animation 0.6s linear;
-        pointer-events: none;
-    }
-    
-    @keyframes ripple-animation {
-        to {
-            transform: scale(4);
-            opacity: 0;
-        }
-    }
-    
-    /* تحسين الـ scrollbar */
-    ::-webkit-scrollbar {
-        width: 8px;
-    }
-    
-    ::-webkit-scrollbar-track {
-        background: rgba(255, 255, 255, 0.1);
-        border-radius: 4px;
-    }
-    
-    ::-webkit-scrollbar-thumb {
-        background: var(--secondary-gradient);
-        border-radius: 4px;
-    }
-    
-    ::-webkit-scrollbar-thumb:hover {
-        background: var(--success-gradient);
-    }
-    
-    /* تحسينات للوضع الليلي */
-    @media (prefers-color-scheme: dark) {
-        :root {
-            --glass-bg: rgba(0, 0, 0, 0.3);
-            --glass-border: rgba(255, 255, 255, 0.1);
-        }
-    }
-    
-    /* تحسينات للحركة المحدودة */
-    @media (prefers-reduced-motion: reduce) {
-        * {
-            animation-duration: 0.01ms !important;
-            animation-iteration-count: 1 !important;
-            transition-duration: 0.01ms !important;
-        }
-    }
-    
-    /* تأثيرات التركيز للوحة المفاتيح */
-    .focus-visible:focus-visible {
-        outline: 2px solid #4ade80;
-        outline-offset: 2px;
-    }
-    
-    button:focus-visible,
-    input:focus-visible {
-        outline: 2px solid #3b82f6;
-        outline-offset: 2px;
-    }
-    
-    /* تأثير النصوص المتدرجة */
-    .gradient-text {
-        background: var(--secondary-gradient);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-        font-weight: bold;
-    }
-    
-    /* تأثير الظهور التدريجي */
-    .fade-in {
-        animation: fadeIn 0.6s ease-out;
-    }
-    
-    @keyframes fadeIn {
-        from {
-            opacity: 0;
-        }
-        to {
-            opacity: 1;
-        }
-    }
-    
-    /* تأثير الإكمال التلقائي */
-    .autocomplete-container {
-        position: relative;
-    }
-    
-    .autocomplete-suggestions {
-        position: absolute;
-        top: 100%;
-        left: 0;
-        right: 0;
-        background: var(--glass-bg);
-        backdrop-filter: blur(10px);
-        -webkit-backdrop-filter: blur(10px);
-        border: 1px solid var(--glass-border);
-        border-radius: 10px;
-        max-height: 200px;
-        overflow-y: auto;
-        z-index: 1000;
-        margin-top: 5px;
-    }
-    
-    .autocomplete-suggestion {
-        padding: 10px 15px;
-        cursor: pointer;
-        transition: var(--transition-normal);
-    }
-    
-    .autocomplete-suggestion:hover {
-        background: rgba(102, 126, 234, 0.2);
-    }
-    
-    .autocomplete-suggestion strong {
-        color: #4ade80;
-    }
-</style>
-""", unsafe_allow_html=True)
+# التصميم العصري (CSS/JS) ملفات ثابتة في static/ — نحقن مرجعاً صغيراً فقط في كل إعادة تشغيل
+st.markdown(theme.head_html(), unsafe_allow_html=True)
 
 # إضافة الرأس مع الأيقونات التفاعلية
 st.markdown("""
@@ -685,9 +56,8 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ================= تهيئة التخزين =================
-# تهيئة قاموس لتخزين الأرقام الضريبية وأسماء البائعين
-if "vat_sellers" not in st.session_state:
-    st.session_state["vat_sellers"] = {}
+# سجل البائعين الدائم المشترك بين كل المشغّلين (SQLite) — راجع labelkit/sellers.py
+seller_registry = sellers.registry()
 
 # ================= حالة افتراضية ثابتة (مرة واحدة فقط) =================
 if "qr_initialized" not in st.session_state:
@@ -708,7 +78,7 @@ if "qr_initialized" not in st.session_state:
 # ================= دالة لتغيير لون الرقم الضريبي ومنع الإدخال بعد 15 رقم =================
 def update_vat_color():
     vat_number = st.session_state.get("qr_vat_number", "")
-    vat_clean = _clean_vat(vat_number)
+    vat_clean = clean_vat(vat_number)
     
     # إذا تجاوز العدد 15 رقم، قص القيمة إلى 15 رقم فقط
     if len(vat_clean) > 15:
@@ -716,131 +86,84 @@ def update_vat_color():
         vat_clean = vat_clean[:15]
     
     # التحقق إذا كان الرقم الضريبي مخزن مسبقاً
-    if len(vat_clean) == 15 and vat_clean in st.session_state["vat_sellers"]:
-        seller_name = st.session_state["vat_sellers"][vat_clean]
+    seller_name = seller_registry.get(vat_clean) if len(vat_clean) == 15 else None
+    if seller_name:
         if st.session_state.get("qr_seller") != seller_name:
             st.session_state["qr_seller"] = seller_name
-            st.success(f"تم العثور على اسم البائع تلقائياً: {seller_name}")
+            notify("qr", f"تم العثور على اسم البائع تلقائياً: {seller_name}")
 
 # ================= دالة لحفظ البائع مع الرقم الضريبي =================
 def save_seller_with_vat():
     vat_number = st.session_state.get("qr_vat_number", "")
     seller_name = st.session_state.get("qr_seller", "")
-    vat_clean = _clean_vat(vat_number)
+    vat_clean = clean_vat(vat_number)
     
     if len(vat_clean) == 15 and seller_name.strip():
-        st.session_state["vat_sellers"][vat_clean] = seller_name.strip()
-        st.success(f"تم حفظ البائع '{seller_name}' مع الرقم الضريبي '{vat_clean}'")
-
-# ================= أدوات مشتركة =================
-def _clean_vat(v: str) -> str: return re.sub(r"\D", "", v or "")
-
-def _fmt2(x: str) -> str:
-    try: q = Decimal(x)
-    except InvalidOperation: q = Decimal("0")
-    return format(q.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP), "f")
-
-def _iso_utc(d: date, t: time) -> str:
-    local_dt = datetime.combine(d, t.replace(microsecond=0))
-    try:
-        return local_dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-    except Exception:
-        return local_dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-def _tlv(tag: int, val: str) -> bytes:
-    b = val.encode("utf-8")
-    if len(b) > 255: raise ValueError("TLV>255B")
-    return bytes([tag, len(b)]) + b
-
-def build_zatca_base64(seller, vat, dt_iso, total, vat_s):
-    payload = b"".join([_tlv(1,seller), _tlv(2,vat), _tlv(3,dt_iso), _tlv(4,total), _tlv(5,vat_s)])
-    return base64.b64encode(payload).decode("ascii")
-
-# ================= QR (صورة كثيفة) =================
-def make_qr(b64: str) -> bytes:
-    qr = qrcode.QRCode(version=14, error_correction=ERROR_CORRECT_M, box_size=2, border=4)
-    qr.add_data(b64); qr.make(fit=False)
-    img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
-    img = img.resize((640, 640), Image.NEAREST)
-    out = BytesIO(); img.save(out, format="PNG"); return out.getvalue()
-
-# ================= Code128 (بدون هوامش وبالمقاس) =================
-WIDTH_IN, HEIGHT_IN, DPI = 1.86, 0.34, 600
-ARABIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
-
-def sanitize(s: str) -> str:
-    s = (s or "").translate(ARABIC_DIGITS)
-    s = re.sub(r"[\u200e\u200f\u202a-\u202e\u2066-\u2069\ufeff]", "", s)
-    return "".join(ch for ch in s if ord(ch) < 128).strip()
-
-def render_code128(data: str) -> bytes:
-    code = Code128(data, writer=ImageWriter())
-    buf = BytesIO()
-    code.write(buf, {
-        "write_text": False,
-        "dpi": int(DPI),
-        "module_height": HEIGHT_IN * 25.4,  # mm
-        "quiet_zone": 0.0,
-        "background": "white",
-        "foreground": "black",
-    })
-    return buf.getvalue()
-
-def resize_code128(png_bytes: bytes) -> bytes:
-    with Image.open(BytesIO(png_bytes)) as im:
-        im = im.resize((int(WIDTH_IN*DPI), int(HEIGHT_IN*DPI)), Image.NEAREST)
-        out = BytesIO(); im.save(out, format="PNG", dpi=(DPI, DPI))
-        return out.getvalue()
-
-# ================= PDF Metadata =================
-BASE_KEYS = ["/ModDate","/CreationDate","/Producer","/Title","/Author","/Subject","/Keywords","/Creator"]
-
-def pdf_date_to_display_date(s):
-    if not s or not isinstance(s, str): return ""
-    if s.startswith("D:"): s = s[2:]
-    m = re.match(r"^(\d{4})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})", s)
-    if m:
-        y,M,d,H,m_,sec = m.groups()
-        try: return datetime(int(y),int(M),int(d),int(H),int(m_),int(sec)).strftime("%d/%m/%Y, %H:%M:%S")
-        except: return s
-    return s
-
-def display_date_to_pdf_date(s):
-    try: return datetime.strptime(s,"%d/%m/%Y, %H:%M:%S").strftime("D:%Y%m%d%H%M%S+03'00'")
-    except: return s
-
-def parse_display_dt(s: str):
-    try:
-        dt = datetime.strptime(s.strip(), "%d/%m/%Y, %H:%M:%S")
-        return dt.date(), dt.time().replace(microsecond=0)
-    except Exception:
-        return None, None
-
-def read_meta(file):
-    file.seek(0); r = PdfReader(file); md = r.metadata or {}
-    keys = BASE_KEYS + [k for k in md.keys() if k not in BASE_KEYS]
-    out = {}
-    for k in keys:
-        v = md.get(k, "")
-        out[k] = pdf_date_to_display_date(v) if k in ("/CreationDate","/ModDate") else v
-    return out, keys
-
-def write_meta(file, new_md):
-    file.seek(0)
-    r = PdfReader(file); w = PdfWriter()
-    for p in r.pages: w.add_page(p)
-    final = {}
-    for k,v in new_md.items():
-        final[k] = display_date_to_pdf_date(v) if k in ("/CreationDate","/ModDate") else v
-    w.add_metadata(final)
-    out = io.BytesIO(); w.write(out); out.seek(0); return out
-
-# =========================================================
-# الصف الأعلى: (يسار) الحاسبة  —  (يمين) Metadata
-# =========================================================
-c1, c2 = st.columns(2)
-
-with c1:
+        seller_registry.put(vat_clean, seller_name)
+        notify("qr", f"تم حفظ البائع '{seller_name}' مع الرقم الضريبي '{vat_clean}'")
+
+# ================= اختيار بائع من نتائج البحث =================
+def pick_seller():
+    vat = st.session_state.get("seller_pick")
+    if vat:
+        st.session_state["qr_vat_number"] = vat
+        st.session_state["qr_seller"] = seller_registry.get(vat) or ""
+
+# ================= الذاكرة المؤقتة للصور =================
+def cache_caption() -> str:
+    s = cache.images.stats()
+    return f"cache: {s['hits']} hit / {s['misses']} miss · {s['entries']} صورة · {s['bytes'] // 1024} KB"
+
+# ================= صيغة ملفات الصور =================
+FORMAT_LABELS = {"png": "PNG أحادي البت", "png-palette": "PNG بلوحة لونين", "tiff-g4": "TIFF G4 (أرشفة)",
+                 "svg": "SVG (متجه)", "pdf": "PDF (متجه)", "zpl": "ZPL (طابعة Zebra)"}
+
+def output_format(key: str) -> str:
+    return st.selectbox("صيغة الملف", list(output.FORMATS), format_func=FORMAT_LABELS.get, key=key)
+
+# ================= ختم QR على الفواتير =================
+ANCHOR_LABELS = {"top-left": "أعلى اليسار", "top-right": "أعلى اليمين", "bottom-left": "أسفل اليسار", "bottom-right": "أسفل اليمين"}
+
+def stamp_options(key: str) -> dict:
+    a, b, c = st.columns(3)
+    anchor = a.selectbox("الموضع", list(stamp.ANCHORS), format_func=ANCHOR_LABELS.get, key=f"{key}_anchor")
+    margin = b.number_input("الهامش (مم)", min_value=0.0, value=stamp.MARGIN_MM, step=1.0, key=f"{key}_margin")
+    size = c.number_input("ضلع الرمز (مم)", min_value=10.0, value=stamp.SIZE_MM, step=1.0, key=f"{key}_size")
+    vec = st.checkbox("رمز متجه (بدل صورة 640px)", value=True, key=f"{key}_vector")
+    return {"anchor": anchor, "margin_mm": margin, "size_mm": size, "vector": vec}
+
+def current_qr_payload():
+    # حمولة ZATCA من حقول مولّد QR الحالية، أو None إن كان الرقم الضريبي غير صالح
+    vclean = clean_vat(st.session_state["qr_vat_number"])
+    if len(vclean) != 15: return None
+    return build_zatca_base64(
+        st.session_state["qr_seller"].strip(),
+        vclean,
+        iso_utc(st.session_state["qr_date"], st.session_state["qr_time"]),
+        fmt2(st.session_state["qr_total"]),
+        fmt2(st.session_state["qr_vat"])
+    )
+
+# ================= رسائل صريحة بين البطاقات =================
+# كل بطاقة fragment مستقل: التفاعل داخلها يعيد تشغيلها وحدها. ما تُرسله بطاقة لأخرى
+# يوضع في صندوق بريد البطاقة المستهدفة ثم يُعاد تشغيل الصفحة مرة واحدة؛ البطاقة
+# المستهدفة تطبّق رسائلها قبل رسم حقولها.
+def notify(card: str, note: str = "", **values):
+    # بلا إعادة تشغيل: لاستدعاءات on_change التي تسبق تشغيل البطاقة نفسها (لا تعرض عناصر داخل fragment)
+    st.session_state.setdefault(f"_inbox_{card}", []).append((note, values))
+
+def post(card: str, note: str = "", **values):
+    notify(card, note, **values)
+    st.rerun()
+
+def deliver(card: str):
+    for note, values in st.session_state.pop(f"_inbox_{card}", []):
+        st.session_state.update(values)
+        if note: st.toast(note)
+
+# ================= بطاقة الحاسبة =================
+@st.fragment
+def calculator_card():
     st.markdown('<div class="card glass-effect hover-lift">', unsafe_allow_html=True)
     st.markdown('<h2><i class="fas fa-calculator"></i> حاسبة الضريبة</h2>', unsafe_allow_html=True)
     total_incl = st.number_input("المبلغ شامل الضريبة", min_value=0.0, step=0.01)
@@ -849,36 +172,52 @@ with c1:
     colA, colB = st.columns(2)
     with colA:
         if st.button("احسب الآن"):
-            rate = tax_rate/100.0
-            before = round(total_incl/(1+rate), 2)
-            vat_amount = round(total_incl - before, 2)
+            before, vat_amount = split_vat(total_incl, tax_rate)
             st.success(f"قبل الضريبة: {before:.2f} | الضريبة: {vat_amount:.2f}")
     with colB:
         if st.button("📤 إرسال القيم إلى مولّد QR"):
             # تحديث الإجمالي والضريبة فقط — بدون أي مساس بالتاريخ/الوقت
-            rate = tax_rate/100.0 if tax_rate else 0.0
-            before = round(total_incl/(1+rate), 2) if total_incl and rate else 0.0
-            vat_amount = round(total_incl - before, 2) if total_incl and rate else 0.0
-            st.session_state["qr_total"] = f"{total_incl:.2f}"
-            st.session_state["qr_vat"]   = f"{vat_amount:.2f}"
-            st.toast("تم إرسال الإجمالي والضريبة إلى قسم مولّد QR ✅")
+            # النصّان من نفس الهللات التي قسمها split_vat (نصف-لأعلى)، لا من تقريب float بـ :.2f
+            total_h = to_halalas(total_incl)
+            _, vat_h = split_halalas([total_h], tax_rate)
+            total_s, vat_s = format_halalas([total_h, vat_h[0]])
+            post("qr", "تم إرسال الإجمالي والضريبة إلى قسم مولّد QR ✅", qr_total=total_s, qr_vat=vat_s)
+
+    with st.expander("📊 حساب جماعي لعمود مبالغ (CSV)"):
+        vat_up = st.file_uploader("ملف CSV بمبالغ شاملة الضريبة", type=["csv"], key="vat_bulk_file")
+        vat_col = st.text_input("اسم عمود المبلغ (الافتراضي أول عمود)", key="vat_bulk_col")
+        if vat_up and st.button("احسب الملف"):
+            out_tmp = tempfile.TemporaryFile("w+", encoding="utf-8-sig", newline="")
+            stats = split_csv(vat_up, out_tmp, tax_rate, vat_col.strip())
+            out_tmp.seek(0)
+            st.success(f"{stats['rows']} سطر | الإجمالي: {stats['total']/100:,.2f} | قبل الضريبة: {stats['net']/100:,.2f} | الضريبة: {stats['vat']/100:,.2f}")
+            if stats["invalid"]: st.warning(f"مبالغ غير صالحة: {stats['invalid']}")
+            st.download_button("⬇️ تحميل النتائج CSV", out_tmp.buffer.read(), "vat_split.csv", "text/csv")
     st.markdown('</div>', unsafe_allow_html=True)
 
-with c2:
+# ================= بطاقة PDF Metadata =================
+@st.fragment
+def metadata_card():
     st.markdown('<div class="card glass-effect hover-lift">', unsafe_allow_html=True)
     st.markdown('<h2><i class="fas fa-file-pdf"></i> Edit Metadata PDF</h2>', unsafe_allow_html=True)
     up = st.file_uploader("تحميل PDF", type=["pdf"])
     if up:
-        if "meta_dict" not in st.session_state or st.session_state.get("_last_file_name") != up.name:
-            meta, keys = read_meta(up)
+        # الرفع في ذاكرة Streamlit أصلاً والقارئ من الذيل يعمل عليه مباشرة (seek) — بلا نسخة؛
+        # البصمة تُحسب مرة واحدة لكل رفع والتحليل مُخزَّن حسبها
+        memo = st.session_state.get("_pdf_src")
+        if memo is None or memo[0] != up.file_id:
+            memo = (up.file_id, pdfmeta.content_hash(up))
+            st.session_state._pdf_src = memo
+        digest, src = memo[1], up
+        if "meta_dict" not in st.session_state or st.session_state.get("_meta_hash") != digest:
+            _, meta, keys = pdfmeta.read_meta_cached(src, digest)
             st.session_state.meta_keys = keys
             st.session_state.meta_dict = meta
-            st.session_state._last_file_name = up.name
+            st.session_state._meta_hash = digest
             for k, v in meta.items():
-                if k not in st.session_state:
-                    st.session_state[k] = v
-            st.session_state.setdefault("_prev_creation", st.session_state.get("/CreationDate", ""))
-            st.session_state.setdefault("_prev_mod",       st.session_state.get("/ModDate", ""))
+                st.session_state[k] = v
+            st.session_state["_prev_creation"] = st.session_state.get("/CreationDate", "")
+            st.session_state["_prev_mod"]      = st.session_state.get("/ModDate", "")
 
         auto = st.checkbox("تحديث تلقائي ثنائي الاتجاه بين ModDate و CreationDate (أثناء الكتابة)", value=True, key="_auto_sync")
 
@@ -907,50 +246,140 @@ with c2:
             d, t = parse_display_dt(cre)
             if d and t:
                 # حفظ نهائي لقيم التاريخ/الوقت في مفاتيح QR (لن تُمس لاحقًا)
-                st.session_state["qr_date"]    = d
-                st.session_state["qr_time"]    = t
-                st.session_state["qr_time_hm"] = t.replace(second=0)
-                st.session_state["qr_secs"]    = t.second
-                st.success("تم إرسال التاريخ والوقت إلى قسم مولّد QR ✅")
+                post("qr", "تم إرسال التاريخ والوقت إلى قسم مولّد QR ✅",
+                     qr_date=d, qr_time=t, qr_time_hm=t.replace(second=0), qr_secs=t.second)
             else:
                 st.error("صيغة CreationDate غير صحيحة. الصيغة: dd/mm/YYYY, HH:MM:SS")
 
+        incr = st.checkbox("حفظ تزايدي سريع (بدون إعادة كتابة الصفحات)", value=True, key="_incremental_save")
         if st.button("حفظ Metadata"):
-            out = write_meta(up, updated)
+            out = write_meta(src, updated, incremental=incr)
             st.download_button("تحميل الملف المعدّل", data=out, file_name=up.name, mime="application/pdf")
-    st.markdown('</div>', unsafe_allow_html=True)
 
-# =========================================================
-# الصف الأسفل: (يسار) Code128  —  (يمين) مولّد QR
-# =========================================================
-c3, c4 = st.columns(2)
+        with st.expander("🔏 ختم رمز QR على الصفحة الأولى"):
+            st.caption("يستخدم بيانات مولّد QR الحالية — الصفحات الأخرى تُنسخ كما هي بدون إعادة كتابة")
+            opts = stamp_options("stamp")
+            if st.button("ختم QR"):
+                b64 = current_qr_payload()
+                if b64 is None:
+                    st.error("الرقم الضريبي في مولّد QR يجب أن يكون 15 رقمًا.")
+                else:
+                    out, _ = stamp.stamp_pdf(src, b64, **opts)
+                    st.download_button("⬇️ تحميل الفاتورة المختومة", data=out, file_name=up.name, mime="application/pdf")
+
+    with st.expander("🔏 ختم QR جماعي على فواتير PDF (ZIP + سجل الفواتير)"):
+        st.caption("كل ملف يُطابق سطر السجل الذي رقم فاتورته (invoice) يساوي اسم الملف بدون .pdf")
+        stamp_zip = st.file_uploader("ملف ZIP بالفواتير", type=["zip"], key="stamp_bulk_zip")
+        stamp_ledger = st.file_uploader("سجل الفواتير (CSV / JSONL)", type=["csv", "jsonl", "ndjson"], key="stamp_bulk_ledger")
+        bulk_opts = stamp_options("stamp_bulk")
+        stamp_workers = st.number_input("عدد العمليات", min_value=1, max_value=64, value=bulk.default_workers(), step=1, key="stamp_bulk_workers")
+        if stamp_zip and stamp_ledger and st.button("ختم الفواتير"):
+            bar = st.progress(0.0, text="جارٍ الختم...")
+            report = []
+            zip_tmp = tempfile.TemporaryFile()
+            records = bulk.iter_records(stamp_ledger, stamp_ledger.name)
+            for done, total in bulk.bulk_stamp(stamp_zip, records, zip_tmp, int(stamp_workers), report, **bulk_opts):
+                bar.progress(done / max(1, total), text=f"{done} / {total}")
+            bar.progress(1.0, text="اكتمل ✅")
+            zip_tmp.seek(0)
+            st.download_button("⬇️ تحميل ZIP المختوم", zip_tmp, "invoices_stamped.zip", "application/zip")
+            failed = sum(1 for r in report if r["status"] != "ok")
+            (st.warning if failed else st.success)(f"تم ختم {len(report) - failed} فاتورة — فشل {failed}")
+            st.dataframe(report[:1000])
+
+    with st.expander("📦 تعديل جماعي لملفات PDF (ZIP)"):
+        pdf_zip = st.file_uploader("ملف ZIP يحتوي ملفات PDF", type=["zip"], key="pdf_bulk_zip")
+        set_producer = st.text_input("Producer (اتركه فارغاً لعدم التغيير)", key="pdf_bulk_producer")
+        set_author = st.text_input("Author (اتركه فارغاً لعدم التغيير)", key="pdf_bulk_author")
+        sd, sh, sm = st.columns(3)
+        shift_days = sd.number_input("إزاحة الأيام", value=0, step=1, key="pdf_bulk_days")
+        shift_hours = sh.number_input("إزاحة الساعات", value=0, step=1, key="pdf_bulk_hours")
+        shift_mins = sm.number_input("إزاحة الدقائق", value=0, step=1, key="pdf_bulk_mins")
+        sync_mod = st.checkbox("ModDate = CreationDate", value=False, key="pdf_bulk_sync")
+        pdf_workers = st.number_input("عدد العمليات", min_value=1, max_value=64, value=bulk.default_workers(), step=1, key="pdf_bulk_workers")
+        if pdf_zip and st.button("تطبيق على كل الملفات"):
+            rules = {
+                "set": {k: v.strip() for k, v in (("/Producer", set_producer), ("/Author", set_author)) if v.strip()},
+                "shift": timedelta(days=int(shift_days), hours=int(shift_hours), minutes=int(shift_mins)),
+                "sync_moddate": sync_mod,
+            }
+            bar = st.progress(0.0, text="جارٍ المعالجة...")
+            report = []
+            zip_tmp = tempfile.TemporaryFile()
+            for done, total in bulk.bulk_pdf_meta(pdf_zip, zip_tmp, rules, int(pdf_workers), report):
+                bar.progress(done / max(1, total), text=f"{done} / {total}")
+            bar.progress(1.0, text="اكتمل ✅")
+            zip_tmp.seek(0)
+            st.download_button("⬇️ تحميل ZIP المعدّل", zip_tmp, "pdf_metadata_bulk.zip", "application/zip")
+            failed = sum(1 for r in report if r["status"] != "ok")
+            (st.warning if failed else st.success)(f"تمت معالجة {len(report) - failed} ملف — فشل {failed}")
+            st.dataframe(report[:1000])
+    st.markdown('</div>', unsafe_allow_html=True)
 
-with c3:
+# ================= بطاقة Code-128 =================
+@st.fragment
+def code128_card():
     st.markdown('<div class="card glass-effect hover-lift">', unsafe_allow_html=True)
     st.markdown('<h2><i class="fas fa-barcode"></i> مولّد Code-128</h2>', unsafe_allow_html=True)
     v = st.text_input("النص/الرقم")
+    c128_fmt = output_format("c128_fmt")
     if st.button("إنشاء Code-128"):
         s = sanitize(v)
         if not s: st.error("أدخل قيمة.")
         else:
-            raw = render_code128(s)
-            final = resize_code128(raw)
+            final = render_code128(s)
             st.markdown('<div class="image-container">', unsafe_allow_html=True)
             st.image(final, caption=f"{WIDTH_IN}×{HEIGHT_IN} inch @ {DPI} DPI")
             st.markdown('</div>', unsafe_allow_html=True)
-            st.download_button("⬇️ تحميل", final, "code128.png", "image/png")
+            st.caption(cache_caption())
+            if c128_fmt == "png": data = final
+            elif c128_fmt in raster.FORMATS: data = render_code128(s, fmt=c128_fmt)
+            else: data = output.code128_bytes(s, c128_fmt)
+            st.download_button("⬇️ تحميل", data, "code128" + output.ext(c128_fmt), output.mime(c128_fmt))
+
+    with st.expander("📦 إنشاء جماعي من ملف (CSV / JSONL)"):
+        bulk_up = st.file_uploader("ملف القيم", type=["csv", "jsonl", "ndjson"], key="c128_bulk_file")
+        bulk_col = st.text_input("اسم العمود/الحقل (اختياري — الافتراضي أول عمود أو data)", key="c128_bulk_col")
+        bulk_workers = st.number_input("عدد العمليات", min_value=1, max_value=64, value=bulk.default_workers(), step=1, key="c128_bulk_workers")
+        if bulk_up and st.button("إنشاء ZIP"):
+            total_rows = max(1, bulk_up.getvalue().count(b"\n"))
+            bar = st.progress(0.0, text="جارٍ التوليد...")
+            errs = []
+            zip_tmp = tempfile.TemporaryFile()
+            for done in bulk.bulk_code128(bulk.iter_values(bulk_up, bulk_up.name, bulk_col.strip()), zip_tmp, int(bulk_workers), errs, c128_fmt):
+                if done % 200 == 0: bar.progress(min(1.0, done / total_rows), text=f"{done} / ~{total_rows}")
+            bar.progress(1.0, text="اكتمل ✅")
+            zip_tmp.seek(0)
+            st.download_button("⬇️ تحميل ZIP", zip_tmp, "code128_bulk.zip", "application/zip")
+            if errs:
+                st.warning(f"أسطر مرفوضة: {len(errs)}")
+                st.dataframe([{"row": n, "value": v, "error": e} for n, v, e in errs[:1000]])
+                st.download_button("⬇️ تحميل قائمة الأخطاء", bulk.errors_csv(errs), "code128_errors.csv", "text/csv")
     st.markdown('</div>', unsafe_allow_html=True)
 
-with c4:
+# ================= بطاقة مولّد QR =================
+@st.fragment
+def qr_card():
+    deliver("qr")
     st.markdown('<div class="card glass-effect hover-lift">', unsafe_allow_html=True)
     st.markdown('<h2><i class="fas fa-qrcode"></i> مولّد QR (ZATCA)</h2>', unsafe_allow_html=True)
 
+    # بحث بجزء من الرقم الضريبي أو من اسم البائع (يتجاهل الهمزات والتشكيل والتاء المربوطة)
+    seller_q = st.text_input("🔎 بحث عن بائع (جزء من الرقم أو الاسم)", key="seller_query")
+    if seller_q.strip():
+        hits = dict(seller_registry.search(seller_q, limit=20))
+        if hits:
+            st.selectbox("نتائج البحث", list(hits), index=None, key="seller_pick", on_change=pick_seller,
+                         format_func=lambda v: f"{hits[v]} — {v}", placeholder="اختر بائعاً")
+        else:
+            st.caption("لا توجد نتائج")
+
     # حقل الرقم الضريبي مع التحقق من الطول ومنع الإدخال بعد 15 رقم
     st.text_input("الرقم الضريبي (15 رقم)", key="qr_vat_number", on_change=update_vat_color, max_chars=15)
     
     # عرض عدد الأرقام المدخلة
     vat_number = st.session_state.get("qr_vat_number", "")
-    vat_clean = _clean_vat(vat_number)
+    vat_clean = clean_vat(vat_number)
     st.caption(f"عدد الأرقام المدخلة: {len(vat_clean)}/15")
     
     # حقل اسم البائع
@@ -966,116 +395,129 @@ with c4:
     st.caption(f"الوقت الحالي: {st.session_state['qr_time'].strftime('%H:%M:%S')}")
 
     st.date_input("التاريخ", key="qr_date", value=st.session_state["qr_date"])
+    qr_fmt = output_format("qr_fmt")
 
     if st.button("إنشاء رمز QR"):
-        vclean = _clean_vat(st.session_state["qr_vat_number"])
-        if len(vclean) != 15:
+        b64 = current_qr_payload()
+        if b64 is None:
             st.error("الرقم الضريبي يجب أن يكون 15 رقمًا.")
         else:
-            iso = _iso_utc(st.session_state["qr_date"], st.session_state["qr_time"])
-            b64 = build_zatca_base64(
-                st.session_state["qr_seller"].strip(),
-                vclean,
-                iso,
-                _fmt2(st.session_state["qr_total"]),
-                _fmt2(st.session_state["qr_vat"])
-            )
             st.code(b64, language="text")
-            img = make_qr(b64)
+            img = render_qr(b64)
             st.markdown('<div class="image-container">', unsafe_allow_html=True)
             st.image(img, caption="رمز QR ZATCA")
             st.markdown('</div>', unsafe_allow_html=True)
-            st.download_button("⬇️ تحميل QR", img, "zatca_qr.png", "image/png")
+            st.caption(cache_caption())
+            if qr_fmt == "png": data = img
+            elif qr_fmt in raster.FORMATS: data = render_qr(b64, qr_fmt)
+            else: data = output.qr_bytes(b64, qr_fmt)
+            st.download_button("⬇️ تحميل QR", data, "zatca_qr" + output.ext(qr_fmt), output.mime(qr_fmt))
+
+    with st.expander(f"🗂️ سجل البائعين ({seller_registry.count():,})"):
+        st.caption("استيراد CSV بعمودين: vat_number, seller — يُحدَّث البائع إن كان موجوداً")
+        sellers_up = st.file_uploader("ملف البائعين", type=["csv"], key="sellers_import_file")
+        if sellers_up and st.button("استيراد البائعين"):
+            n = seller_registry.import_csv(sellers_up)
+            st.success(f"تم استيراد {n:,} بائع")
+        st.download_button("⬇️ تصدير السجل CSV", seller_registry.export_csv, "sellers.csv", "text/csv")
+
+    with st.expander("📦 إنشاء جماعي من سجل الفواتير (CSV / JSONL)"):
+        st.caption("الأعمدة: seller, vat_number, timestamp, total, vat (اختياري: invoice)")
+        ledger_up = st.file_uploader("سجل الفواتير", type=["csv", "jsonl", "ndjson"], key="qr_bulk_file")
+        qr_workers = st.number_input("عدد العمليات", min_value=1, max_value=64, value=bulk.default_workers(), step=1, key="qr_bulk_workers")
+        if ledger_up and st.button("إنشاء ZIP للفواتير"):
+            total_rows = max(1, ledger_up.getvalue().count(b"\n"))
+            bar = st.progress(0.0, text="جارٍ التوليد...")
+            errs = []
+            zip_tmp = tempfile.TemporaryFile()
+            for done in bulk.bulk_zatca(bulk.iter_records(ledger_up, ledger_up.name), zip_tmp, int(qr_workers), errs, qr_fmt):
+                if done % 100 == 0: bar.progress(min(1.0, done / total_rows), text=f"{done} / ~{total_rows}")
+            bar.progress(1.0, text="اكتمل ✅")
+            zip_tmp.seek(0)
+            st.download_button("⬇️ تحميل ZIP (صور + manifest.csv)", zip_tmp, "zatca_qr_bulk.zip", "application/zip")
+            if errs:
+                st.warning(f"فواتير مرفوضة: {len(errs)}")
+                st.dataframe([{"row": n, "invoice": v, "error": e} for n, v, e in errs[:1000]])
+                st.download_button("⬇️ تحميل قائمة الأخطاء", bulk.errors_csv(errs), "zatca_errors.csv", "text/csv")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# ================= بطاقة أوراق الملصقات =================
+@st.fragment
+def sheet_card():
+    st.markdown('<div class="card glass-effect hover-lift">', unsafe_allow_html=True)
+    st.markdown('<h2><i class="fas fa-th"></i> أوراق الملصقات للطباعة (PDF)</h2>', unsafe_allow_html=True)
+    st.caption("يرص رموز Code128 و/أو QR الفواتير على ورق A4 أو رول ملصقات في ملف PDF واحد (Code128 أولاً ثم QR)")
+    tpl = st.selectbox("القالب", list(sheet.TEMPLATES), format_func=lambda k: sheet.TEMPLATES[k][0], key="sheet_tpl")
+    sa, sb = st.columns(2)
+    c128_up = sa.file_uploader("قيم Code128 (CSV / JSONL)", type=["csv", "jsonl", "ndjson"], key="sheet_c128_file")
+    c128_col = sa.text_input("اسم العمود/الحقل (اختياري)", key="sheet_c128_col")
+    ledger_up = sb.file_uploader("سجل الفواتير لـ QR (CSV / JSONL)", type=["csv", "jsonl", "ndjson"], key="sheet_qr_file")
+    skip = sb.number_input("خانات مستعملة في أول ورقة", min_value=0, value=0, step=1, key="sheet_skip")
+    workers = st.number_input("عدد العمليات", min_value=1, max_value=64, value=bulk.default_workers(), step=1, key="sheet_workers")
+    if (c128_up or ledger_up) and st.button("إنشاء ملف الطباعة"):
+        def items():
+            if c128_up:
+                yield from ((n, "code128", v) for n, v in bulk.iter_values(c128_up, c128_up.name, c128_col.strip()))
+            if ledger_up:
+                yield from ((n, "qr", rec) for n, rec in bulk.iter_records(ledger_up, ledger_up.name))
+        total_rows = max(1, sum(f.getvalue().count(b"\n") for f in (c128_up, ledger_up) if f))
+        bar = st.progress(0.0, text="جارٍ التركيب...")
+        errs = []
+        pdf_tmp = tempfile.TemporaryFile()
+        for done in sheet.compose(items(), pdf_tmp, tpl, int(workers), errs, skip=int(skip)):
+            if done % 200 == 0: bar.progress(min(1.0, done / total_rows), text=f"{done} / ~{total_rows}")
+        bar.progress(1.0, text="اكتمل ✅")
+        pdf_tmp.seek(0)
+        st.download_button("⬇️ تحميل PDF", pdf_tmp, f"labels_{tpl}.pdf", "application/pdf")
+        if errs:
+            st.warning(f"ملصقات مرفوضة: {len(errs)}")
+            st.dataframe([{"row": n, "value": v, "error": e} for n, v, e in errs[:1000]])
+            st.download_button("⬇️ تحميل قائمة الأخطاء", bulk.errors_csv(errs), "sheet_errors.csv", "text/csv")
     st.markdown('</div>', unsafe_allow_html=True)
 
+# ================= لوحة توقيت المراحل (تظهر مع ?debug=1) =================
+@st.fragment
+def debug_panel():
+    with st.expander("🛠️ توقيت المراحل (هذه العملية فقط)"):
+        st.caption("هستوغرامات لكل مرحلة: qr.make / qr.image / qr.png / code128.* / pdf.* — نفس بيانات /metrics في labelkit.server")
+        a, b = st.columns(2)
+        a.button("🔄 تحديث", key="_metrics_refresh")
+        if b.button("🧹 تصفير", key="_metrics_reset"): metrics.stages.reset()
+        rows = metrics.stages.snapshot()
+        if rows: st.dataframe(rows, hide_index=True)
+        else: st.caption("لا توجد قياسات بعد")
+        st.code(metrics.stages.prometheus(), language="text")
+
+# =========================================================
+# الصف الأعلى: (يسار) الحاسبة  —  (يمين) Metadata
+# =========================================================
+c1, c2 = st.columns(2)
+
+with c1:
+    calculator_card()
+
+with c2:
+    metadata_card()
+
+# =========================================================
+# الصف الأسفل: (يسار) Code128  —  (يمين) مولّد QR
+# =========================================================
+c3, c4 = st.columns(2)
+
+with c3:
+    code128_card()
+
+with c4:
+    qr_card()
+
+sheet_card()
+
+if st.query_params.get("debug") == "1":
+    debug_panel()
+
 # إضافة الفوتر
 st.markdown("""
 <div class="footer">
     <p>تصميم وتطوير: يوسف الأنسي © 2023 | جميع الحقوق محفوظة</p>
 </div>
 """, unsafe_allow_html=True)
-
-# إضافة JavaScript للتفاعل
-st.markdown("""
-<script>
-    // تحريك شريط التقدم
-    document.addEventListener('DOMContentLoaded', function() {
-        const progressBar = document.getElementById('progressBar');
-        if (progressBar) {
-            setTimeout(() => {
-                progressBar.style.width = '100%';
-            }, 500);
-        }
-        
-        // تأثير الظهور عند التمرير
-        const observerOptions = {
-            root: null,
-            rootMargin: '0px',
-            threshold: 0.1
-        };
-        
-        const observer = new IntersectionObserver((entries) => {
-            entries.forEach(entry => {
-                if (entry.isIntersecting) {
-                    entry.target.style.opacity = 1;
-                    entry.target.style.transform = 'translateY(0)';
-                }
-            });
-        }, observerOptions);
-        
-        document.querySelectorAll('.card').forEach(card => {
-            card.style.opacity = 0;
-            card.style.transform = 'translateY(20px)';
-            card.style.transition = 'opacity 0.6s ease, transform 0.6s ease';
-            observer.observe(card);
-        });
-        
-        // تأثير النبض للأيقونات
-        document.querySelectorAll('.pulse-glow').forEach(icon => {
-            setInterval(() => {
-                icon.style.boxShadow = '0 0 ' + (Math.random() * 20 + 20) + 'px rgba(255, 255, 255, ' + (Math.random() * 0.3 + 0.3) + ')';
-            }, 2000);
-        });
-        
-        // تغيير لون الرقم الضريبي للأخضر عند بلوغ 15 رقم ومنع الإدخال بعد ذلك
-        const vatInputs = document.querySelectorAll('input[data-testid="stTextInput"]');
-        vatInputs.forEach(input => {
-            if (input.placeholder && input.placeholder.includes('الرقم الضريبي')) {
-                // منع إدخال غير الأرقام
-                input.addEventListener('input', function(e) {
-                    // السماح فقط بالأرقام
-                    this.value = this.value.replace(/\\D/g, '');
-                    
-                    // منع الإدخال بعد 15 رقم
-                    if (this.value.length > 15) {
-                        this.value = this.value.substring(0, 15);
-                    }
-                    
-                    // تغيير اللون عند الوصول لـ 15 رقم
-                    if (this.value.length === 15) {
-                        this.classList.add('vat-valid');
-                    } else {
-                        this.classList.remove('vat-valid');
-                    }
-                });
-                
-                // منع اللصق إذا كان يحتوي على غير أرقام أو أكثر من 15 رقم
-                input.addEventListener('paste', function(e) {
-                    e.preventDefault();
-                    const pastedData = e.clipboardData.getData('text');
-                    const cleanData = pastedData.replace(/\\D/g, '').substring(0, 15);
-                    this.value = cleanData;
-                    
-                    // تغيير اللون عند الوصول لـ 15 رقم
-                    if (this.value.length === 15) {
-                        this.classList.add('vat-valid');
-                    } else {
-                        this.classList.remove('vat-valid');
-                    }
-                });
-            }
-        });
-    });
-</script>
-""", unsafe_allow_html=True)
-
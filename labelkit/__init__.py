@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# ================= labelkit: نواة بدون واجهة (بدون Streamlit) =================
+# الواجهة البرمجية الثابتة لـ ZATCA QR و Code128 و PDF Metadata — يمكن استيرادها
+# مباشرة من العمّال والخدمات الخلفية. app.py مجرد واجهة Streamlit فوقها.
+from labelkit.code128 import WIDTH_IN, HEIGHT_IN, DPI, sanitize, render_png as render_code128_png, render_code128
+from labelkit.zatca import (
+    _tlv as tlv, _clean_vat as clean_vat, _fmt2 as fmt2, _iso_utc as iso_utc,
+    build_zatca_base64, split_vat, make_qr, render_qr, qr_matrix, verify_qr_png, ledger_payload, parse_timestamp,
+)
+from labelkit.vat import split_halalas, parse_amounts, format_halalas, split_csv, to_halalas
+from labelkit.pdfmeta import (
+    BASE_KEYS, read_meta, write_meta, read_info, info_update, apply_rules,
+    content_hash, read_meta_cached,
+    pdf_date_to_display_date, display_date_to_pdf_date, parse_display_dt,
+    TailReadError, IncrementalUnsupported,
+)
+
+__version__ = "1.0.0"
+
+# labelkit.verify يُحمَّل عند أول استخدام فقط: استيراده هنا يجعل `python -m labelkit.verify`
+# يجده في sys.modules قبل تنفيذه (تحذير runpy)
+_LAZY = {"decode_tlv": "labelkit.verify", "decode_payload": "labelkit.verify", "check_payload": "labelkit.verify"}
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = [
+    "WIDTH_IN", "HEIGHT_IN", "DPI", "sanitize", "render_code128", "render_code128_png",
+    "tlv", "clean_vat", "fmt2", "iso_utc", "build_zatca_base64", "split_vat",
+    "split_halalas", "parse_amounts", "format_halalas", "split_csv", "to_halalas",
+    "decode_tlv", "decode_payload", "check_payload",
+    "make_qr", "render_qr", "qr_matrix", "verify_qr_png", "ledger_payload", "parse_timestamp",
+    "BASE_KEYS", "read_meta", "write_meta", "read_info", "info_update", "apply_rules",
+    "content_hash", "read_meta_cached",
+    "pdf_date_to_display_date", "display_date_to_pdf_date", "parse_display_dt",
+    "TailReadError", "IncrementalUnsupported",
+]
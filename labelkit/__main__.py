@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+import sys
+
+from labelkit.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
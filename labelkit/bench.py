@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# ================= مقاييس الأداء مع خط أساس JSON وعتبات تراجع =================
+# لكل حالة: الإنتاجية (عملية/ث) و p50/p90/p99 بالمللي ثانية وذروة الذاكرة (tracemalloc،
+# في تمريرة منفصلة حتى لا تؤثر على التوقيت). الاستخدام:
+#   python -m labelkit.bench --save bench.json                 # تسجيل خط أساس
+#   python -m labelkit.bench --baseline bench.json             # مقارنة؛ رمز خروج 1 عند التراجع
+#   python -m labelkit.bench --filter pdf --threshold 0.25 --min-time 2
+import argparse, io, json, platform, sys, time, tracemalloc
+from datetime import date, time as dtime
+
+from labelkit import __version__, code128, pdfmeta, sheet, stamp, vector, zatca
+
+SAMPLE = ("مؤسسة الأمل التجارية", "300000000000003", "2024-01-01T12:00:00Z", "115.00", "15.00")
+PDF_PAGES = (1, 100, 1000)
+
+def _pdf(pages: int) -> bytes:
+    from pypdf import PdfWriter
+    w = PdfWriter()
+    for _ in range(pages): w.add_blank_page(595, 842)
+    w.add_metadata({"/Producer": "labelkit bench", "/CreationDate": "D:20240101120000"})
+    out = io.BytesIO(); w.write(out)
+    return out.getvalue()
+
+def _write_case(data: bytes, incremental: bool):
+    md, _ = pdfmeta.read_meta(io.BytesIO(data))
+    md = dict(md, **{"/Producer": "bench"})
+    return lambda: pdfmeta.write_meta(io.BytesIO(data), md, incremental=incremental)
+
+def cases() -> dict:
+    """{الاسم: دالة بلا وسائط} — الإعداد (توليد الملفات مثلاً) خارج القياس."""
+    b64 = zatca.build_zatca_base64(*SAMPLE)
+    out = {
+        "tlv": lambda: zatca._tlv(1, SAMPLE[0]),
+        "build_zatca_base64": lambda: zatca.build_zatca_base64(*SAMPLE),
+        "iso_utc": lambda: zatca._iso_utc(date(2024, 1, 1), dtime(12, 0, 0)),
+        "make_qr": lambda: zatca.make_qr(b64),
+        "sanitize": lambda: code128.sanitize("  ٦٢٨١٠٠٠٠٠٠١١٣-ABC‏ "),
+        "render_code128": lambda: code128.render_png("6281000000113"),
+    }
+    for fmt in vector.FORMATS:
+        out[f"code128[{fmt}]"] = (lambda f: lambda: vector.code128("6281000000113", f))(fmt)
+        out[f"qr[{fmt}]"] = (lambda f: lambda: vector.qr(b64, f))(fmt)
+    labels = [(i, "code128", f"6281000{i:06d}") for i in range(240)]
+    out["sheet[a4-3x8,240]"] = lambda: sum(1 for _ in sheet.compose(labels, io.BytesIO(), "a4-3x8", workers=1))
+    for n in PDF_PAGES:
+        data = _pdf(n)
+        out[f"read_meta[{n}p]"] = (lambda d: lambda: pdfmeta.read_meta(io.BytesIO(d)))(data)
+        out[f"write_meta_incremental[{n}p]"] = _write_case(data, True)
+        out[f"write_meta_rewrite[{n}p]"] = _write_case(data, False)
+        out[f"stamp[{n}p]"] = (lambda d: lambda: stamp.stamp_pdf(io.BytesIO(d), b64))(data)
+    return out
+
+def _pct(sorted_vals, q: float) -> float:
+    i = min(len(sorted_vals) - 1, max(0, round(q * (len(sorted_vals) - 1))))
+    return sorted_vals[i]
+
+def measure(fn, min_time: float = 1.0, min_iters: int = 5, max_iters: int = 100_000) -> dict:
+    fn()  # إحماء (استيراد كسول، lru_cache، ...)
+    lat, start = [], time.perf_counter()
+    while len(lat) < max_iters and (len(lat) < min_iters or time.perf_counter() - start < min_time):
+        t = time.perf_counter(); fn(); lat.append(time.perf_counter() - t)
+    wall = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        fn(); peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    lat.sort()
+    return {
+        "iters": len(lat), "ops_per_s": round(len(lat) / wall, 2),
+        "p50_ms": round(_pct(lat, 0.50) * 1e3, 4), "p90_ms": round(_pct(lat, 0.90) * 1e3, 4),
+        "p99_ms": round(_pct(lat, 0.99) * 1e3, 4), "peak_kb": round(peak / 1024, 1),
+    }
+
+def run(filter_: str = "", min_time: float = 1.0, log=None) -> dict:
+    results = {}
+    for name, fn in cases().items():
+        if filter_ and filter_ not in name: continue
+        results[name] = measure(fn, min_time)
+        if log: log(f"{name:32} {results[name]['ops_per_s']:>12,.1f}/s  p50 {results[name]['p50_ms']:>10.3f} ms  "
+                    f"p99 {results[name]['p99_ms']:>10.3f} ms  peak {results[name]['peak_kb']:>10,.1f} KB")
+    return {
+        "meta": {"labelkit": __version__, "python": platform.python_version(), "machine": platform.machine(),
+                 "platform": platform.platform(), "min_time": min_time},
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float = 0.15, mem_threshold: float = 0.25) -> list:
+    """قائمة بالتراجعات: p50 أبطأ أو ذروة ذاكرة أعلى من خط الأساس بأكثر من العتبة."""
+    out = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base: continue
+        if cur["p50_ms"] > base["p50_ms"] * (1 + threshold):
+            out.append(f"{name}: p50 {base['p50_ms']} → {cur['p50_ms']} ms (+{cur['p50_ms'] / base['p50_ms'] - 1:.0%})")
+        if base["peak_kb"] and cur["peak_kb"] > base["peak_kb"] * (1 + mem_threshold):
+            out.append(f"{name}: peak {base['peak_kb']} → {cur['peak_kb']} KB (+{cur['peak_kb'] / base['peak_kb'] - 1:.0%})")
+    return out
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m labelkit.bench", description="Benchmark labelkit rendering and PDF paths")
+    ap.add_argument("--filter", default="", help="تشغيل الحالات التي يحتوي اسمها هذا النص فقط")
+    ap.add_argument("--min-time", type=float, default=1.0, help="ثوانٍ لكل حالة")
+    ap.add_argument("--save", help="كتابة النتائج JSON (خط أساس جديد)")
+    ap.add_argument("--baseline", help="خط أساس JSON للمقارنة")
+    ap.add_argument("--threshold", type=float, default=0.15, help="أقصى تباطؤ مسموح في p50 (0.15 = 15%%)")
+    ap.add_argument("--mem-threshold", type=float, default=0.25, help="أقصى زيادة مسموحة في ذروة الذاكرة")
+    args = ap.parse_args(argv)
+    current = run(args.filter, args.min_time, log=lambda s: print(s, file=sys.stderr))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f: json.dump(current, f, indent=2, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f: baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold, args.mem_threshold)
+        for r in regressions: print("REGRESSION", r, file=sys.stderr)
+        if regressions: return 1
+        print(f"no regressions vs {args.baseline}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+# ================= التوليد الجماعي (مجموعة عمليات + ZIP متدفق) =================
+# كل دالة عامل (worker) هنا على مستوى الوحدة حتى يمكن إرسالها إلى عمليات منفصلة.
+import csv, io, json, os, re, shutil, tempfile, zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import get_context
+
+from labelkit import code128, output, pdfmeta, raster, stamp, zatca
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 1) - 1)
+
+def pool(workers: int = 0) -> ProcessPoolExecutor:
+    # spawn وليس fork: خادم Streamlit متعدد الخيوط
+    return ProcessPoolExecutor(max_workers=workers or default_workers(), mp_context=get_context("spawn"))
+
+def imap_bounded(fn, items, workers: int = 0, window: int = 0, chunksize: int = 32, executor=None):
+    """ينفّذ fn على العناصر بالتوازي ويعيد (item, result, error) فور الانتهاء.
+
+    العناصر تُرسل على دفعات (chunksize) لتقليل كلفة التراسل بين العمليات، وعدد
+    الدفعات المعلّقة محدود بـ window حتى تبقى الذاكرة ثابتة مهما كان حجم الملف.
+    """
+    if workers == 1 and executor is None:
+        # عملية واحدة: بدون مجموعة عمليات ولا تكلفة تراسل
+        for chunk in _chunks(items, chunksize):
+            yield from zip(chunk, *zip(*_run_chunk(fn, chunk)))
+        return
+    own = executor is None
+    ex = executor or pool(workers)
+    window = window or 4 * (workers or default_workers())
+    pending = {}
+    try:
+        for chunk in _chunks(items, chunksize):
+            pending[ex.submit(_run_chunk, fn, chunk)] = chunk
+            if len(pending) < window: continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                yield from zip(pending.pop(f), *zip(*f.result()))
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                yield from zip(pending.pop(f), *zip(*f.result()))
+    finally:
+        for f in pending: f.cancel()
+        if own: ex.shutdown(wait=True, cancel_futures=True)
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk; chunk = []
+    if chunk: yield chunk
+
+def _run_chunk(fn, chunk):
+    # خطأ في عنصر واحد لا يُسقط بقية الدفعة
+    out = []
+    for item in chunk:
+        try: out.append((fn(item), None))
+        except Exception as e: out.append((None, f"{type(e).__name__}: {e}"))
+    return out
+
+# ================= قراءة الملفات المرفوعة =================
+def iter_values(fileobj, name: str = "", column: str = ""):
+    """يعيد (رقم السطر, القيمة) من CSV أو JSONL دون تحميل الملف كاملاً.
+
+    CSV: العمود المسمّى column أو أول عمود. JSONL: الحقل column، أو "data"، أو سلسلة JSON.
+    """
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        if name.lower().endswith((".jsonl", ".ndjson", ".json")):
+            yield from _iter_jsonl(text, column)
+        else:
+            yield from _iter_csv(text, column)
+    finally:
+        text.detach()
+
+def _iter_csv(text, column):
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None: return
+    col = header.index(column) if column in header else 0
+    for n, row in enumerate(reader, start=2):
+        if not row: continue
+        yield n, row[col] if col < len(row) else ""
+
+def _iter_jsonl(text, column):
+    for n, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line: continue
+        try: rec = json.loads(line)
+        except ValueError as e:
+            yield n, e; continue
+        if isinstance(rec, dict):
+            rec = rec.get(column or "data", next(iter(rec.values()), ""))
+        yield n, rec if isinstance(rec, str) else str(rec)
+
+def iter_records(fileobj, name: str = ""):
+    """يعيد (رقم السطر, dict) من CSV (بترويسة) أو JSONL — سطراً سطراً."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        if name.lower().endswith((".jsonl", ".ndjson", ".json")):
+            for n, line in enumerate(text, start=1):
+                line = line.strip()
+                if not line: continue
+                try: rec = json.loads(line)
+                except ValueError as e:
+                    yield n, e; continue
+                yield n, rec if isinstance(rec, dict) else ValueError("السطر ليس كائن JSON")
+        else:
+            for n, rec in enumerate(csv.DictReader(text), start=2):
+                yield n, {(k or "").strip(): v for k, v in rec.items()}
+    finally:
+        text.detach()
+
+def safe_name(s: str, limit: int = 40) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", s)[:limit].strip("._") or "item"
+
+# ================= Code128 جماعي =================
+def _code128_job(item):
+    n, s, fmt = item
+    return output.code128_bytes(s, fmt)
+
+def bulk_code128(values, zip_out, workers: int = 0, errors: list = None, fmt: str = output.DEFAULT_FORMAT):
+    """يرسم كل قيمة في عملية منفصلة ويكتب الصورة (fmt) في ZIP بمجرد جاهزيتها.
+
+    values: (رقم السطر, النص). يعيد مولّداً لعدد العناصر المنجزة؛ الأسطر
+    المرفوضة تُضاف إلى errors كـ (رقم السطر, القيمة, السبب).
+    """
+    errors = [] if errors is None else errors
+
+    def jobs():
+        for n, raw in values:
+            if isinstance(raw, Exception):
+                errors.append((n, "", f"JSON: {raw}")); continue
+            s = code128.sanitize(raw)
+            if not s:
+                errors.append((n, raw, "قيمة فارغة بعد التنظيف")); continue
+            yield n, s, fmt
+
+    done = 0
+    with zipfile.ZipFile(zip_out, "w", compression=zipfile.ZIP_STORED) as zf:
+        for (n, s, _), png, err in imap_bounded(_code128_job, jobs(), workers):
+            if err is not None:
+                errors.append((n, s, err))
+            else:
+                zf.writestr(f"{n:06d}_{safe_name(s)}{output.ext(fmt)}", png)
+            done += 1
+            yield done
+
+# ================= ZATCA QR جماعي =================
+def _zatca_job(item):
+    n, rec, fmt = item
+    b64 = zatca.ledger_payload(rec)
+    m = zatca.qr_matrix(b64)
+    png = output.qr_bytes(b64, fmt, m)
+    # التحقق العكسي بالبكسلات للصيغ النقطية فقط؛ المتجهة تُكتب من المصفوفة مباشرة
+    bad = zatca.verify_qr_png(png, m) if fmt in raster.FORMATS else 0
+    if bad: raise ValueError(f"QR round-trip mismatch: {bad} modules")
+    return b64, png
+
+def bulk_zatca(records, zip_out, workers: int = 0, errors: list = None, fmt: str = output.DEFAULT_FORMAT):
+    """سجل فواتير → ZIP فيه صورة (fmt) لكل فاتورة + manifest.csv بالحمولات (base64).
+
+    records: (رقم السطر, dict). الـ manifest يُكتب إلى ملف مؤقت أثناء التوليد ثم
+    يُلحق بالـ ZIP في النهاية، فلا يُحتفظ بأي صورة في الذاكرة.
+    """
+    errors = [] if errors is None else errors
+
+    def jobs():
+        for n, rec in records:
+            if isinstance(rec, Exception):
+                errors.append((n, "", f"JSON: {rec}")); continue
+            yield n, rec, fmt
+
+    done = 0
+    with tempfile.TemporaryFile("w+", encoding="utf-8-sig", newline="") as man, \
+         zipfile.ZipFile(zip_out, "w", compression=zipfile.ZIP_STORED) as zf:
+        mw = csv.writer(man); mw.writerow(["row", "invoice", "file", "base64", "error"])
+        for (n, rec, _), res, err in imap_bounded(_zatca_job, jobs(), workers):
+            inv = zatca._field(rec, "invoice")
+            if err is not None:
+                errors.append((n, inv, err)); mw.writerow([n, inv, "", "", err])
+            else:
+                b64, png = res
+                fname = f"{n:06d}_{safe_name(inv)}{output.ext(fmt)}" if inv else f"{n:06d}{output.ext(fmt)}"
+                zf.writestr(fname, png); mw.writerow([n, inv, fname, b64, ""])
+            done += 1
+            yield done
+        man.seek(0)
+        with zf.open("manifest.csv", "w") as dst:
+            shutil.copyfileobj(man.buffer, dst)
+
+# ================= PDF Metadata جماعي =================
+REPORT_KEYS = ("/CreationDate", "/ModDate", "/Producer", "/Author", "/Title")
+
+def _pdf_meta_job(item):
+    name, data, rules = item
+    md, _ = pdfmeta.read_meta(io.BytesIO(data))
+    new_md = pdfmeta.apply_rules(md, rules)
+    out = pdfmeta.write_meta(io.BytesIO(data), new_md).getvalue()
+    return out, {k: new_md.get(k, "") for k in REPORT_KEYS}
+
+def bulk_pdf_meta(zip_in, zip_out, rules: dict, workers: int = 0, report: list = None):
+    """يطبّق rules (انظر pdfmeta.apply_rules) على كل PDF داخل zip_in.
+
+    الملفات تُقرأ من الأرشيف واحداً تلو الآخر وتُرسل للعمليات ضمن نافذة محدودة،
+    والنتائج تُكتب في zip_out فور جاهزيتها. يعيد (المنجز, الإجمالي) بعد كل ملف،
+    ويضيف سطراً لكل ملف في report.
+    """
+    report = [] if report is None else report
+    with zipfile.ZipFile(zip_in) as zin, zipfile.ZipFile(zip_out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        names = [i.filename for i in zin.infolist() if not i.is_dir() and i.filename.lower().endswith(".pdf")]
+        jobs = ((n, zin.read(n), rules) for n in names)
+        done = 0
+        for (name, _, _), res, err in imap_bounded(_pdf_meta_job, jobs, workers, chunksize=1):
+            if err is not None:
+                report.append({"file": name, "status": "error", "error": err})
+            else:
+                data, md = res
+                zf.writestr(name, data)
+                report.append({"file": name, "status": "ok", "error": "", **{k.lstrip("/"): v for k, v in md.items()}})
+            done += 1
+            yield done, len(names)
+        with zf.open("report.csv", "w") as dst:
+            dst.write(report_csv(report))
+
+# ================= ختم QR على فواتير PDF جماعياً =================
+STAMP_REPORT_COLS = ["file", "invoice", "status", "mode", "error"]
+
+def _stamp_job(item):
+    name, data, rec, opts = item
+    b64 = zatca.ledger_payload(rec)
+    out, mode = stamp.stamp_pdf(io.BytesIO(data), b64, **opts)
+    return out.getvalue(), mode
+
+def bulk_stamp(zip_in, records, zip_out, workers: int = 0, report: list = None, **opts):
+    """يختم رمز ZATCA على الصفحة الأولى من كل PDF داخل zip_in (انظر stamp.stamp_pdf لـ opts).
+
+    records: (رقم السطر, dict) من سجل الفواتير؛ كل PDF يُطابق السطر الذي رقم فاتورته
+    يساوي اسم الملف بدون الامتداد. السجل يُفهرس في الذاكرة (سطر صغير لكل فاتورة) والملفات
+    تُقرأ وتُرسل للعمليات واحداً تلو الآخر كما في bulk_pdf_meta. يعيد (المنجز, الإجمالي).
+    """
+    report = [] if report is None else report
+    ledger = {}
+    for _, rec in records:
+        if isinstance(rec, Exception): continue
+        inv = zatca._field(rec, "invoice")
+        if inv: ledger[inv] = rec
+    with zipfile.ZipFile(zip_in) as zin, zipfile.ZipFile(zip_out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        names = []
+        for i in zin.infolist():
+            if i.is_dir() or not i.filename.lower().endswith(".pdf"): continue
+            inv = os.path.splitext(os.path.basename(i.filename))[0]
+            if inv in ledger: names.append((i.filename, inv))
+            else: report.append({"file": i.filename, "invoice": inv, "status": "error", "error": "لا يوجد سطر بهذا الرقم في سجل الفواتير"})
+        jobs = ((name, zin.read(name), ledger[inv], opts) for name, inv in names)
+        done = 0
+        for (name, _, rec, _), res, err in imap_bounded(_stamp_job, jobs, workers, chunksize=1):
+            inv = zatca._field(rec, "invoice")
+            if err is not None:
+                report.append({"file": name, "invoice": inv, "status": "error", "error": err})
+            else:
+                data, mode = res
+                zf.writestr(name, data)
+                report.append({"file": name, "invoice": inv, "status": "ok", "mode": mode, "error": ""})
+            done += 1
+            yield done, len(names)
+        with zf.open("report.csv", "w") as dst:
+            dst.write(report_csv(report, STAMP_REPORT_COLS))
+
+def report_csv(rows, cols: list = None) -> bytes:
+    out = io.StringIO()
+    cols = cols or ["file", "status", "error"] + [k.lstrip("/") for k in REPORT_KEYS]
+    w = csv.DictWriter(out, fieldnames=cols, extrasaction="ignore"); w.writeheader(); w.writerows(rows)
+    return out.getvalue().encode("utf-8-sig")
+
+def errors_csv(errors) -> bytes:
+    out = io.StringIO()
+    w = csv.writer(out); w.writerow(["row", "value", "error"]); w.writerows(errors)
+    return out.getvalue().encode("utf-8-sig")
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# ================= ذاكرة مؤقتة للصور المرسومة (مفتاح = تجزئة المحتوى) =================
+# مشتركة بين كل الجلسات داخل العملية نفسها، بميزانية ذاكرة وإخراج LRU.
+import hashlib, threading
+from collections import OrderedDict
+
+class RenderCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def key(kind: str, payload: str, params=()) -> str:
+        h = hashlib.sha256()
+        h.update(kind.encode()); h.update(b"\0")
+        h.update(repr(tuple(params)).encode()); h.update(b"\0")
+        h.update(payload.encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            val = self._items.get(key)
+            if val is None:
+                self.misses += 1; return None
+            self._items.move_to_end(key); self.hits += 1
+            return val
+
+    def put(self, key: str, val: bytes):
+        if len(val) > self.max_bytes: return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None: self._size -= len(old)
+            self._items[key] = val; self._size += len(val)
+            while self._size > self.max_bytes:
+                _, ev = self._items.popitem(last=False)
+                self._size -= len(ev); self.evictions += 1
+
+    def get_or_render(self, kind: str, payload: str, render, params=()) -> bytes:
+        # الرسم يتم خارج القفل؛ طلبان متزامنان لنفس المفتاح قد يرسمان مرتين (لا ضرر)
+        k = self.key(kind, payload, params)
+        val = self.get(k)
+        if val is None:
+            val = render(payload)
+            self.put(k, val)
+        return val
+
+    def clear(self):
+        with self._lock:
+            self._items.clear(); self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._items), "bytes": self._size, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+# نسخة واحدة لكل عملية — Streamlit يستورد الوحدة مرة واحدة لكل الجلسات
+images = RenderCache()
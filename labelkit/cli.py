@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# ================= سطر الأوامر: مهام JSONL متدفقة =================
+# كل سطر في المدخلات مهمة واحدة:
+#   {"op": "zatca-qr", "seller": ..., "vat_number": ..., "timestamp": ..., "total": ..., "vat": ...}
+#   {"op": "code128", "data": "..."}
+#   {"op": "pdf-meta", "path": "in.pdf", "set": {"/Producer": "..."}, "shift_minutes": 0, "sync_moddate": false}
+#   {"op": "zatca-verify", "b64": "..."}
+#   {"op": "zatca-stamp", "path": "invoice.pdf", "seller": ..., ..., "anchor": "top-left", "margin_mm": 10, "size_mm": 25, "vector": true}
+# ولكل مهمة سطر نتيجة في المخرجات (JSONL) فور انتهائها. الاستخدام:
+#   python -m labelkit jobs.jsonl --out-dir out --workers 4
+#   cat jobs.jsonl | python -m labelkit --inline > results.jsonl
+import argparse, base64, json, os, re, sys
+from datetime import timedelta
+
+from labelkit import bulk, code128, output, pdfmeta, stamp, verify, zatca
+
+OPS = ("zatca-qr", "code128", "pdf-meta", "zatca-verify", "zatca-stamp")
+
+def _output(rec: dict, ctx: dict, data: bytes, ext: str) -> dict:
+    if ctx["inline"]: return {ext.lstrip(".") + "_b64": base64.b64encode(data).decode("ascii")}
+    name = re.sub(r"[^\w.-]+", "_", str(rec.get("id") or "")).strip("._") or f"{ctx['line']:06d}"
+    path = os.path.join(ctx["out_dir"], name + ext)
+    with open(path, "wb") as f: f.write(data)
+    return {"file": path}
+
+def run_job(item) -> dict:
+    line, rec, ctx = item
+    ctx = dict(ctx, line=line)
+    op = rec.get("op")
+    if op == "zatca-qr":
+        b64 = zatca.ledger_payload(rec)
+        return {"base64": b64, **_output(rec, ctx, output.qr_bytes(b64, ctx["fmt"]), output.ext(ctx["fmt"]))}
+    if op == "code128":
+        s = code128.sanitize(str(rec.get("data", "")))
+        if not s: raise ValueError("empty data after sanitize")
+        return {"data": s, **_output(rec, ctx, output.code128_bytes(s, ctx["fmt"]), output.ext(ctx["fmt"]))}
+    if op == "pdf-meta":
+        with open(rec["path"], "rb") as f:
+            md, _ = pdfmeta.read_meta(f)
+            rules = {
+                "set": rec.get("set") or {},
+                "shift": timedelta(minutes=float(rec.get("shift_minutes") or 0)),
+                "sync_moddate": bool(rec.get("sync_moddate")),
+            }
+            new_md = pdfmeta.apply_rules(md, rules)
+            out = pdfmeta.write_meta(f, new_md).getvalue()
+        return {"meta": new_md, **_output(rec, ctx, out, ".pdf")}
+    if op == "zatca-verify":
+        issues = verify.check_payload(str(rec.get("b64", "")))
+        return {"valid": not issues, "issues": issues}
+    if op == "zatca-stamp":
+        b64 = zatca.ledger_payload(rec)
+        with open(rec["path"], "rb") as f:
+            out, mode = stamp.stamp_pdf(
+                f, b64, anchor=rec.get("anchor") or stamp.DEFAULT_ANCHOR,
+                margin_mm=float(rec.get("margin_mm", stamp.MARGIN_MM)), size_mm=float(rec.get("size_mm", stamp.SIZE_MM)),
+                vector=bool(rec.get("vector", True)),
+            )
+        return {"base64": b64, "mode": mode, **_output(rec, ctx, out.getvalue(), ".pdf")}
+    raise ValueError(f"unknown op {op!r} (expected one of {', '.join(OPS)})")
+
+def iter_jobs(stream, ctx: dict, errors):
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line: continue
+        try:
+            rec = json.loads(line)
+            if not isinstance(rec, dict): raise ValueError("record is not a JSON object")
+        except ValueError as e:
+            errors.append({"line": line_no, "ok": False, "error": f"JSON: {e}"}); continue
+        yield line_no, rec, ctx
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m labelkit", description="ZATCA QR / Code128 / PDF metadata jobs from JSONL")
+    ap.add_argument("input", nargs="?", default="-", help="ملف JSONL أو - للقراءة من stdin")
+    ap.add_argument("-o", "--output", default="-", help="ملف نتائج JSONL (الافتراضي stdout)")
+    ap.add_argument("--out-dir", default="out", help="مجلد الملفات الناتجة")
+    ap.add_argument("--inline", action="store_true", help="ضع الناتج base64 داخل سطر النتيجة بدل كتابة ملفات")
+    ap.add_argument("--format", default=output.DEFAULT_FORMAT, choices=list(output.FORMATS), help="صيغة مخرجات QR و Code128")
+    ap.add_argument("--workers", type=int, default=bulk.default_workers())
+    ap.add_argument("--chunksize", type=int, default=16)
+    args = ap.parse_args(argv)
+
+    if not args.inline: os.makedirs(args.out_dir, exist_ok=True)
+    ctx = {"inline": args.inline, "out_dir": args.out_dir, "fmt": args.format}
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8-sig")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    failed, errors = 0, []
+    try:
+        for (line, rec, _), res, err in bulk.imap_bounded(run_job, iter_jobs(src, ctx, errors), args.workers, chunksize=args.chunksize):
+            for e in errors: dst.write(json.dumps(e, ensure_ascii=False) + "\n")
+            failed += len(errors); errors.clear()
+            row = {"line": line, "id": rec.get("id"), "op": rec.get("op")}
+            row.update({"ok": True, **res} if err is None else {"ok": False, "error": err})
+            failed += err is not None
+            dst.write(json.dumps(row, ensure_ascii=False) + "\n"); dst.flush()
+        for e in errors: dst.write(json.dumps(e, ensure_ascii=False) + "\n")
+        failed += len(errors)
+    finally:
+        if src is not sys.stdin: src.close()
+        if dst is not sys.stdout: dst.close()
+    return 1 if failed else 0
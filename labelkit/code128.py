@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# ================= محرك Code128 مباشر إلى المقاس النهائي =================
+# يحوّل النص إلى أنماط الوحدات (modules) ثم إلى صورة بالمقاس النهائي مباشرة
+# بدون ImageWriter وبدون خطوة resize ثانية — ترميز PNG واحد فقط لكل باركود.
+import re
+from functools import lru_cache
+
+from PIL import Image
+
+from labelkit import cache, metrics, raster
+
+WIDTH_IN, HEIGHT_IN, DPI = 1.86, 0.34, 600
+ARABIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+MARGIN_MM = 1.0  # هامش أبيض أعلى/أسفل الأشرطة (نفس margin_top/bottom في ImageWriter)
+
+def sanitize(s: str) -> str:
+    s = (s or "").translate(ARABIC_DIGITS)
+    s = re.sub(r"[\u200e\u200f\u202a-\u202e\u2066-\u2069\ufeff]", "", s)
+    return "".join(ch for ch in s if ord(ch) < 128).strip()
+
+# عروض (شريط/فراغ) لكل رمز 0..105 — كل رمز 11 وحدة
+_WIDTHS = (
+    "212222", "222122", "222221", "121223", "121322", "131222", "122213", "122312",
+    "132212", "221213", "221312", "231212", "112232", "122132", "122231", "113222",
+    "123122", "123221", "223211", "221132", "221231", "213212", "223112", "312131",
+    "311222", "321122", "321221", "312212", "322112", "322211", "212123", "212321",
+    "232121", "111323", "131123", "131321", "112313", "132113", "132311", "211313",
+    "231113", "231311", "112133", "112331", "132131", "113123", "113321", "133121",
+    "313121", "211331", "231131", "213113", "213311", "213131", "311123", "311321",
+    "331121", "312113", "312311", "332111", "314111", "221411", "431111", "111224",
+    "111422", "121124", "121421", "141122", "141221", "112214", "112412", "122114",
+    "122411", "142112", "142211", "241211", "221114", "413111", "241112", "134111",
+    "111242", "121142", "121241", "114212", "124112", "124211", "411212", "421112",
+    "421211", "212141", "214121", "412121", "111143", "111341", "131141", "114113",
+    "114311", "411113", "411311", "113141", "114131", "311141", "411131", "211412",
+    "211214", "211232",
+)
+_STOP_WIDTHS = "2331112"  # 13 وحدة (تشمل شريط الإنهاء)
+
+def _bits(widths: str) -> bytes:
+    out = bytearray()
+    for i, w in enumerate(widths):
+        out += (b"\x01" if i % 2 == 0 else b"\x00") * int(w)
+    return bytes(out)
+
+# جداول مسبقة: لكل رمز سلسلة وحدات (1 = أسود)
+PATTERNS = tuple(_bits(w) for w in _WIDTHS)
+STOP = _bits(_STOP_WIDTHS)
+
+START = {"A": 103, "B": 104, "C": 105}
+_SWITCH = {  # رمز الانتقال حسب المجموعة الحالية
+    "A": {"B": 100, "C": 99},
+    "B": {"A": 101, "C": 99},
+    "C": {"A": 101, "B": 100},
+}
+
+def _in_a(ch: str) -> bool: return ord(ch) < 96
+def _in_b(ch: str) -> bool: return 32 <= ord(ch) < 128
+
+def _value(ch: str, charset: str) -> int:
+    o = ord(ch)
+    if charset == "A": return o - 32 if o >= 32 else o + 64
+    return o - 32
+
+def encode(data: str) -> list:
+    """قائمة قيم الرموز (بدون checksum) — نفس منطق اختيار المجموعات في python-barcode."""
+    if not data: raise ValueError("Code128: empty data")
+    for ch in data:
+        if ord(ch) >= 128: raise ValueError(f"Code128: unsupported character {ch!r}")
+    charset, buf = "C", ""
+    codes = [START["C"]]
+
+    def switch(to):
+        nonlocal charset
+        codes.append(_SWITCH[charset][to]); charset = to
+
+    for pos, ch in enumerate(data):
+        run = 0
+        for c in data[pos:pos + 10]:
+            if not c.isdigit(): break
+            run += 1
+        if charset == "C" and not ch.isdigit():
+            switch("B" if _in_b(ch) else "A")
+            if len(buf) == 1:
+                codes.append(_value(buf, charset)); buf = ""
+        elif charset in ("A", "B") and run > 3:
+            switch("C")
+        elif charset == "B" and not _in_b(ch):
+            switch("A")
+        elif charset == "A" and not _in_a(ch):
+            switch("B")
+
+        if charset == "C":
+            buf += ch
+            if len(buf) == 2:
+                codes.append(int(buf)); buf = ""
+        else:
+            codes.append(_value(ch, charset))
+    if len(buf) == 1:
+        switch("B"); codes.append(_value(buf, charset))
+    # بدء مباشر بالمجموعة المطلوبة بدل START_C + TO_x
+    if len(codes) > 1 and codes[1] in (100, 101):
+        codes[:2] = [START["B"] if codes[1] == 100 else START["A"]]
+    return codes
+
+def checksum(codes: list) -> int:
+    return (codes[0] + sum(i * c for i, c in enumerate(codes[1:], start=1))) % 103
+
+def modules(data: str) -> bytes:
+    codes = encode(data)
+    codes.append(checksum(codes))
+    return b"".join(PATTERNS[c] for c in codes) + STOP
+
+@lru_cache(maxsize=256)
+def _column_map(n: int, width: int) -> tuple:
+    # نفس أخذ العينات من مركز البكسل الذي يستخدمه Image.NEAREST
+    return tuple(min(n - 1, (2 * x + 1) * n // (2 * width)) for x in range(width))
+
+def target_size(width_in: float = WIDTH_IN, height_in: float = HEIGHT_IN, dpi: int = DPI):
+    return int(width_in * dpi), int(height_in * dpi)
+
+@lru_cache(maxsize=64)
+def _row_mask(height: int, height_in: float) -> tuple:
+    # True للصفوف التي تقع داخل الأشرطة (بعد استبعاد الهامشين)
+    bar_mm = height_in * 25.4
+    total = bar_mm + 2 * MARGIN_MM
+    return tuple(MARGIN_MM <= (y + 0.5) * total / height < MARGIN_MM + bar_mm for y in range(height))
+
+def render_image(data: str, width_in: float = WIDTH_IN, height_in: float = HEIGHT_IN, dpi: int = DPI) -> Image.Image:
+    # صورة "1" مباشرة: كل صف 1 بت/بكسل (1 = أبيض)، والصفوف خارج الأشرطة بيضاء
+    with metrics.stages.time("code128.encode"):
+        mods = modules(data)
+    with metrics.stages.time("code128.raster"):
+        w, h = target_size(width_in, height_in, dpi)
+        stride = (w + 7) // 8
+        bits = "".join("0" if mods[i] else "1" for i in _column_map(len(mods), w))
+        bars = int(bits.ljust(stride * 8, "1"), 2).to_bytes(stride, "big")
+        blank = b"\xff" * stride
+        return Image.frombytes("1", (w, h), b"".join(bars if inside else blank for inside in _row_mask(h, height_in)))
+
+def render_png(data: str, width_in: float = WIDTH_IN, height_in: float = HEIGHT_IN, dpi: int = DPI,
+               fmt: str = raster.DEFAULT_FORMAT, zlib_level: int = raster.ZLIB_LEVEL) -> bytes:
+    # fmt: png | png-palette | tiff-g4 (راجع labelkit/raster.py)
+    im = render_image(data, width_in, height_in, dpi)
+    with metrics.stages.time("code128.png"):
+        return raster.encode(im, fmt, zlib_level, dpi)
+
+def render_code128(data: str, width_in: float = WIDTH_IN, height_in: float = HEIGHT_IN, dpi: int = DPI,
+                   fmt: str = raster.DEFAULT_FORMAT) -> bytes:
+    # render_png مع الذاكرة المؤقتة المشتركة (المفتاح يشمل المقاس والدقة والصيغة)
+    return cache.images.get_or_render(
+        "code128", data, lambda s: render_png(s, width_in, height_in, dpi, fmt), (width_in, height_in, dpi, fmt))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# ================= توقيت المراحل (هستوغرامات بنمط Prometheus) =================
+# with metrics.stages.time("qr.make"): ...  — تكلفة ~1 ميكروثانية لكل مرحلة.
+# لكل عملية سجلها الخاص (عمّال المجموعة لا يُجمَّعون هنا). LABELKIT_METRICS=0 يعطّل القياس.
+import os, threading, time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+# حدود الدلاء بالثواني (le) — من 50 ميكروثانية إلى 10 ثوانٍ
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ENABLED = os.environ.get("LABELKIT_METRICS", "1") != "0"
+
+class StageTimer:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._hist = {}  # stage → [عدّادات الدلاء..., +Inf], المجموع, العدد, الأقصى
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            h = self._hist.get(stage)
+            if h is None: h = self._hist[stage] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0.0]
+            h[0][i] += 1; h[1] += seconds; h[2] += 1
+            if seconds > h[3]: h[3] = seconds
+
+    @contextmanager
+    def _timed(self, stage: str):
+        t = time.perf_counter()
+        try: yield
+        finally: self.observe(stage, time.perf_counter() - t)
+
+    def time(self, stage: str):
+        return self._timed(stage) if ENABLED else nullcontext()
+
+    def reset(self):
+        with self._lock: self._hist.clear()
+
+    def drain(self) -> dict:
+        # ما سُجّل منذ آخر drain (قابل للـ pickle) — لنقل توقيتات عمّال المجموعة إلى العملية الأم
+        with self._lock:
+            out, self._hist = self._hist, {}
+        return out
+
+    def merge(self, data: dict):
+        with self._lock:
+            for stage, (counts, total, n, mx) in data.items():
+                h = self._hist.get(stage)
+                if h is None: h = self._hist[stage] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0.0]
+                h[0] = [a + b for a, b in zip(h[0], counts)]
+                h[1] += total; h[2] += n; h[3] = max(h[3], mx)
+
+    def _quantile(self, counts, n, q: float) -> float:
+        # الحد الأعلى للدلو الذي يبلغ الترتيب q (تقدير Prometheus بدون استيفاء)
+        rank, acc = q * n, 0
+        for i, c in enumerate(counts):
+            acc += c
+            if acc >= rank: return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> list:
+        """[{stage, count, total_ms, mean_ms, p50_ms, p99_ms, max_ms}] مرتبة بالوقت الكلي.
+        p50/p99 هما الحد الأعلى للدلو (دقة الهستوغرام)، لا قيمة مقيسة."""
+        with self._lock:
+            items = [(s, list(h[0]), h[1], h[2], h[3]) for s, h in self._hist.items()]
+        rows = [{
+            "stage": s, "count": n, "total_ms": round(total * 1e3, 3), "mean_ms": round(total / n * 1e3, 4),
+            "p50_ms": self._quantile(counts, n, 0.5) * 1e3, "p99_ms": self._quantile(counts, n, 0.99) * 1e3,
+            "max_ms": round(mx * 1e3, 4),
+        } for s, counts, total, n, mx in items if n]
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def prometheus(self, name: str = "labelkit_stage_seconds") -> str:
+        with self._lock:
+            items = sorted((s, list(h[0]), h[1], h[2]) for s, h in self._hist.items())
+        lines = [f"# HELP {name} Time spent per rendering/PDF stage.", f"# TYPE {name} histogram"]
+        for stage, counts, total, n in items:
+            lab = stage.replace("\\", "\\\\").replace('"', '\\"')
+            acc = 0
+            for le, c in zip(self.buckets + ("+Inf",), counts):
+                acc += c
+                lines.append(f'{name}_bucket{{stage="{lab}",le="{le}"}} {acc}')
+            lines.append(f'{name}_sum{{stage="{lab}"}} {total:.9f}')
+            lines.append(f'{name}_count{{stage="{lab}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+# نسخة واحدة لكل عملية، مثل cache.images
+stages = StageTimer()
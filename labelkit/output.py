@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# ================= كل صيغ الإخراج (نقطية + متجهة) خلف واجهة واحدة =================
+from labelkit import code128, raster, vector, zatca
+
+FORMATS = {**raster.FORMATS, **vector.FORMATS}
+DEFAULT_FORMAT = raster.DEFAULT_FORMAT
+
+def check_format(fmt: str) -> str:
+    if fmt not in FORMATS: raise ValueError(f"unknown output format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    return fmt
+
+def mime(fmt: str) -> str: return FORMATS[check_format(fmt)][0]
+
+def ext(fmt: str) -> str: return FORMATS[check_format(fmt)][1]
+
+def code128_bytes(data: str, fmt: str = DEFAULT_FORMAT) -> bytes:
+    if check_format(fmt) in vector.FORMATS: return vector.code128(data, fmt)
+    return code128.render_png(data, fmt=fmt)
+
+def qr_bytes(b64: str, fmt: str = DEFAULT_FORMAT, m=None) -> bytes:
+    if check_format(fmt) in vector.FORMATS: return vector.qr(b64, fmt, m)
+    return zatca.matrix_png(zatca.qr_matrix(b64) if m is None else m, fmt=fmt)
@@ -0,0 +1,525 @@
+# -*- coding: utf-8 -*-
+# ================= PDF Metadata: قراءة من الذيل + حفظ تزايدي =================
+import hashlib, mmap, re, shutil, threading, zlib
+from collections import OrderedDict
+from io import BytesIO
+from datetime import datetime
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import create_string_object
+
+from labelkit import metrics
+
+class IncrementalUnsupported(Exception):
+    """الملف لا يسمح بتحديث تزايدي آمن (مشفّر، تالف، ...) — استخدم إعادة الكتابة الكاملة."""
+
+_NAME_REGULAR = re.compile(rb"[!-~]")
+_NAME_DELIMS = b"()<>[]{}/%#"
+
+def pdf_name(key: str) -> bytes:
+    raw = key[1:] if key.startswith("/") else key
+    out = bytearray(b"/")
+    for c in raw.encode("utf-8"):
+        b = bytes([c])
+        out += b if _NAME_REGULAR.fullmatch(b) and b not in _NAME_DELIMS else b"#%02X" % c
+    return bytes(out)
+
+def pdf_string(s: str) -> bytes:
+    s = "" if s is None else str(s)
+    if all(32 <= ord(ch) < 127 for ch in s):
+        esc = s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        return b"(" + esc.encode("ascii") + b")"
+    # نص غير لاتيني (عربي مثلاً): UTF-16BE مع BOM بصيغة hex
+    return b"<FEFF" + s.encode("utf-16-be").hex().upper().encode("ascii") + b">"
+
+# ================= حفظ تزايدي (incremental update) =================
+# بدل نسخ كل الصفحات إلى PdfWriter جديد، نُلحق بنهاية الملف الأصلي قسم تحديث
+# صغيراً فيه كائن Info الجديد + xref + trailer فقط. البايتات الأصلية لا تُمس.
+def _ref(ref) -> bytes:
+    return b"%d %d R" % tuple(ref)
+
+def info_update(data, info: dict) -> bytes:
+    """يعيد قسم التحديث التزايدي الذي يُلحق بـ data ليصبح قاموس Info هو info.
+
+    data: bytes أو ملف ثنائي (يُقرأ ذيله فقط، عبر mmap إن أمكن).
+    """
+    tr = _TailReader(BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data)
+    try:
+        prev = tr.startxref()
+        xref_stream = not tr.src.read(prev, 4).startswith(b"xref")
+        trailer = tr.load().trailer()
+        size_bytes, last = tr.src.size, tr.src.read(tr.src.size - 1, 1)
+    except (TailReadError, KeyError, ValueError, IndexError, TypeError, zlib.error) as e:
+        raise IncrementalUnsupported(str(e)) from e
+    finally:
+        tr.close()
+    if "/Encrypt" in trailer: raise IncrementalUnsupported("encrypted PDF")
+    root = trailer.get("/Root")
+    if not isinstance(root, _Ref): raise IncrementalUnsupported("missing /Root")
+    size = trailer.get("/Size", 0)
+    if not isinstance(size, int) or size <= 0: raise IncrementalUnsupported("missing /Size")
+
+    old_info = trailer.get("/Info")
+    if isinstance(old_info, _Ref):
+        info_num, info_gen = old_info
+    else:
+        info_num, info_gen = size, 0; size += 1
+
+    ids = trailer.get("/ID")
+    id_entry = b""
+    if isinstance(ids, list) and len(ids) == 2 and all(isinstance(x, bytes) for x in ids):
+        id_entry = b"/ID [<%s> <%s>]" % (ids[0].hex().encode(), ids[1].hex().encode())
+
+    out = bytearray(b"" if last in (b"\n", b"\r") else b"\n")
+    info_off = size_bytes + len(out)
+    body = b" ".join(pdf_name(k) + b" " + pdf_string(v) for k, v in info.items())
+    out += b"%d %d obj\n<< %s >>\nendobj\n" % (info_num, info_gen, body)
+
+    info_ref = b"%d %d R" % (info_num, info_gen)
+    xref_off = size_bytes + len(out)
+    if not xref_stream:
+        out += b"xref\n%d 1\n%010d %05d n\r\n" % (info_num, info_off, info_gen)
+        out += b"trailer\n<< /Size %d /Root %s /Info %s /Prev %d %s >>\n" % (size, _ref(root), info_ref, prev, id_entry)
+    else:
+        # الملف يستخدم xref streams — التحديث يجب أن يكون من النوع نفسه
+        xref_num = size; size += 1
+        w = max(4, (xref_off.bit_length() + 7) // 8)
+        rows = sorted([(info_num, info_off, info_gen), (xref_num, xref_off, 0)])
+        stream = b"".join(b"\x01" + off.to_bytes(w, "big") + gen.to_bytes(2, "big") for _, off, gen in rows)
+        index = b" ".join(b"%d 1" % n for n, _, _ in rows)
+        out += b"%d 0 obj\n<< /Type /XRef /Size %d /Index [%s] /W [1 %d 2] /Root %s /Info %s /Prev %d %s /Length %d >>\nstream\n" % (
+            xref_num, size, index, w, _ref(root), info_ref, prev, id_entry, len(stream))
+        out += stream + b"\nendstream\nendobj\n"
+    out += b"startxref\n%d\n%%%%EOF\n" % xref_off
+    return bytes(out)
+
+# ================= قراءة Info من ذيل الملف فقط (بدون PdfReader) =================
+# startxref → قسم xref (جدول أو stream) → trailer → كائن /Info، مع قراءة البايتات
+# المطلوبة فقط عبر mmap أو seek. أي شيء غير متوقع يرفع TailReadError ليعود
+# المستدعي إلى المحلّل الكامل.
+class TailReadError(Exception):
+    pass
+
+class _Ref(tuple):
+    pass
+
+class _Incomplete(Exception):
+    pass
+
+_WS = b" \t\r\n\f\x00"
+_DELIM = b"()<>[]{}/%"
+
+class _Source:
+    def __init__(self, f):
+        self.f, self.mm = f, None
+        try:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.size = len(self.mm)
+        except Exception:
+            f.seek(0, 2); self.size = f.tell()
+
+    def read(self, off: int, n: int) -> bytes:
+        if off < 0 or off >= self.size: raise TailReadError(f"offset {off} out of range")
+        if self.mm is not None: return self.mm[off:off + n]
+        self.f.seek(off); return self.f.read(n)
+
+    def close(self):
+        if self.mm is not None: self.mm.close()
+
+class _Lexer:
+    def __init__(self, buf: bytes, pos: int = 0):
+        self.buf, self.pos = buf, pos
+
+    def skip(self):
+        buf, n = self.buf, len(self.buf)
+        while self.pos < n:
+            c = buf[self.pos]
+            if c in _WS: self.pos += 1
+            elif c == 0x25:  # %
+                while self.pos < n and buf[self.pos] not in b"\r\n": self.pos += 1
+            else: return
+        raise _Incomplete()
+
+    def token(self) -> bytes:
+        self.skip()
+        start = self.pos
+        while self.pos < len(self.buf) and self.buf[self.pos] not in _WS and self.buf[self.pos] not in _DELIM:
+            self.pos += 1
+        if self.pos >= len(self.buf): raise _Incomplete()
+        return self.buf[start:self.pos]
+
+    def value(self):
+        self.skip()
+        buf, c = self.buf, self.buf[self.pos]
+        if buf.startswith(b"<<", self.pos):
+            self.pos += 2; d = {}
+            while True:
+                self.skip()
+                if buf.startswith(b">>", self.pos):
+                    self.pos += 2; return d
+                k = self.value()
+                if not isinstance(k, str) or not k.startswith("/"): raise TailReadError("bad dictionary key")
+                d[k] = self.value()
+        if c == 0x3C: return self._hex()
+        if c == 0x28: return self._literal()
+        if c == 0x2F:
+            self.pos += 1
+            raw = self.token() if self.pos < len(buf) and buf[self.pos] not in _WS + _DELIM else b""
+            return "/" + re.sub(rb"#([0-9A-Fa-f]{2})", lambda m: bytes([int(m.group(1), 16)]), raw).decode("utf-8", "replace")
+        if c == 0x5B:
+            self.pos += 1; arr = []
+            while True:
+                self.skip()
+                if buf[self.pos] == 0x5D:
+                    self.pos += 1; return arr
+                arr.append(self.value())
+        tok = self.token()
+        if tok in (b"true", b"false"): return tok == b"true"
+        if tok == b"null": return None
+        if re.fullmatch(rb"\d+", tok):
+            save = self.pos
+            try:
+                gen = self.token(); kw = self.token()
+                if re.fullmatch(rb"\d+", gen) and kw == b"R": return _Ref((int(tok), int(gen)))
+            except _Incomplete:
+                pass
+            self.pos = save
+            return int(tok)
+        try: return float(tok)
+        except ValueError: raise TailReadError(f"unexpected token {tok[:20]!r}") from None
+
+    def _hex(self) -> bytes:
+        end = self.buf.find(b">", self.pos)
+        if end < 0: raise _Incomplete()
+        h = re.sub(rb"\s", b"", self.buf[self.pos + 1:end]); self.pos = end + 1
+        if len(h) % 2: h += b"0"
+        return bytes.fromhex(h.decode("ascii"))
+
+    def _literal(self) -> bytes:
+        buf, i, depth, out = self.buf, self.pos + 1, 1, bytearray()
+        esc = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f"}
+        while True:
+            if i >= len(buf): raise _Incomplete()
+            c = buf[i]
+            if c == 0x5C:
+                if i + 1 >= len(buf): raise _Incomplete()
+                n = buf[i + 1]
+                if n in esc: out += esc[n]; i += 2
+                elif 0x30 <= n <= 0x37:
+                    m = re.match(rb"[0-7]{1,3}", buf[i + 1:i + 4]); out.append(int(m.group(), 8) & 0xFF); i += 1 + len(m.group())
+                elif n == 0x0D:
+                    i += 3 if buf[i + 2:i + 3] == b"\n" else 2
+                elif n == 0x0A: i += 2
+                else: out.append(n); i += 2
+                continue
+            if c == 0x28: depth += 1
+            elif c == 0x29:
+                depth -= 1
+                if depth == 0:
+                    self.pos = i + 1; return bytes(out)
+            out.append(c); i += 1
+
+class _TailReader:
+    CHUNK = 4096
+    MAX_OBJECT = 1 << 22
+
+    def __init__(self, f):
+        self.src = _Source(f)
+        self.sections = []  # [(trailer, lookup)] من الأحدث إلى الأقدم
+        self._objstm = {}
+
+    def close(self): self.src.close()
+
+    def parse_at(self, off: int, fn):
+        n = self.CHUNK
+        while True:
+            buf = self.src.read(off, n)
+            try: return fn(_Lexer(buf)), buf
+            except _Incomplete:
+                if len(buf) < n or n >= self.MAX_OBJECT: raise TailReadError("truncated object")
+                n *= 4
+
+    def startxref(self) -> int:
+        tail = self.src.read(max(0, self.src.size - 2048), 2048)
+        i = tail.rfind(b"startxref")
+        m = re.match(rb"startxref\s+(\d+)", tail[i:]) if i >= 0 else None
+        if not m: raise TailReadError("startxref not found")
+        return int(m.group(1))
+
+    def load(self):
+        off, seen = self.startxref(), set()
+        while off is not None and len(self.sections) < 64:
+            if off in seen: raise TailReadError("xref /Prev loop")
+            seen.add(off)
+            trailer, lookup = self._section(off)
+            if "/XRefStm" in trailer:
+                _, stm_lookup = self._section(int(trailer["/XRefStm"]))
+                lookup = (lambda a, b: lambda num: a(num) or b(num))(lookup, stm_lookup)
+            self.sections.append((trailer, lookup))
+            off = trailer.get("/Prev")
+        return self
+
+    def trailer(self) -> dict:
+        merged = {}
+        for t, _ in self.sections:
+            for k, v in t.items(): merged.setdefault(k, v)
+        return merged
+
+    def _section(self, off: int):
+        head = self.src.read(off, 32)
+        if head.startswith(b"xref"): return self._table(off)
+        if re.match(rb"\d+\s+\d+\s+obj", head): return self._xref_stream(off)
+        raise TailReadError("startxref does not point at an xref section")
+
+    def _table(self, off: int):
+        subs, pos = [], off + 4
+        while True:
+            buf = self.src.read(pos, 64)
+            lx = _Lexer(buf); lx.skip()
+            if buf.startswith(b"trailer", lx.pos):
+                trailer, _ = self.parse_at(pos + lx.pos + 7, lambda l: l.value())
+                break
+            m = re.match(rb"(\d+)\s+(\d+)[ \t]*(?:\r\n|\r|\n)", buf[lx.pos:])
+            if not m: raise TailReadError("bad xref subsection")
+            start, count = int(m.group(1)), int(m.group(2))
+            data = pos + lx.pos + m.end()
+            entry = 20
+            if count:
+                line = self.src.read(data, 22)
+                e = re.match(rb"\d{10} \d{5} [fn][ \r\n]*", line)
+                if not e: raise TailReadError("bad xref entry")
+                entry = min(20, e.end()) if e.end() >= 19 else 20
+            subs.append((start, count, data, entry))
+            pos = data + count * entry
+
+        def lookup(num):
+            for start, count, data, entry in subs:
+                if start <= num < start + count:
+                    row = self.src.read(data + (num - start) * entry, 18)
+                    if row[17:18] != b"n": return (0, 0, 0)
+                    return (1, int(row[:10]), int(row[11:16]))
+            return None
+        if not isinstance(trailer, dict): raise TailReadError("bad trailer")
+        return trailer, lookup
+
+    def _stream(self, off: int):
+        def obj(lx):
+            if not re.fullmatch(rb"\d+", lx.token()) or not re.fullmatch(rb"\d+", lx.token()) or lx.token() != b"obj":
+                raise TailReadError("bad object header")
+            d = lx.value()
+            if lx.token() != b"stream": raise TailReadError("expected stream")
+            return d, lx.pos
+        (d, pos), buf = self.parse_at(off, obj)
+        pos += 2 if buf[pos:pos + 2] == b"\r\n" else 1
+        length = d.get("/Length")
+        if isinstance(length, _Ref): length = self.resolve(length)
+        if not isinstance(length, int): raise TailReadError("bad /Length")
+        data = self.src.read(off + pos, length)
+        filters = d.get("/Filter") or []
+        filters = [filters] if isinstance(filters, str) else filters
+        parms = d.get("/DecodeParms") or {}
+        parms = parms[0] if isinstance(parms, list) and parms else parms
+        for f in filters:
+            if f != "/FlateDecode": raise TailReadError(f"unsupported filter {f}")
+            data = zlib.decompress(data)
+        if isinstance(parms, dict) and parms.get("/Predictor", 1) >= 10:
+            data = _png_unpredict(data, int(parms.get("/Columns", 1)))
+        return d, data
+
+    def _xref_stream(self, off: int):
+        d, data = self._stream(off)
+        w = [int(x) for x in d["/W"]]
+        idx = d.get("/Index") or [0, d["/Size"]]
+        rowlen, ranges, base = sum(w), [], 0
+        for i in range(0, len(idx), 2):
+            ranges.append((int(idx[i]), int(idx[i + 1]), base)); base += int(idx[i + 1])
+
+        def field(row, k, default):
+            if not w[k]: return default
+            s = sum(w[:k]); return int.from_bytes(row[s:s + w[k]], "big")
+
+        def lookup(num):
+            for start, count, b in ranges:
+                if start <= num < start + count:
+                    row = data[(b + num - start) * rowlen:(b + num - start + 1) * rowlen]
+                    return (field(row, 0, 1), field(row, 1, 0), field(row, 2, 0))
+            return None
+        trailer = {k: v for k, v in d.items() if k not in ("/Filter", "/DecodeParms", "/Length", "/W", "/Index", "/Type")}
+        return trailer, lookup
+
+    def locate(self, num: int):
+        for _, lookup in self.sections:
+            e = lookup(num)
+            if e is not None: return e
+        raise TailReadError(f"object {num} not in xref")
+
+    def resolve(self, ref, depth: int = 0):
+        if depth > 8: raise TailReadError("reference chain too deep")
+        kind, a, b = self.locate(ref[0])
+        if kind == 1:
+            def obj(lx):
+                if int(lx.token()) != ref[0]: raise TailReadError("xref offset mismatch")
+                lx.token()
+                if lx.token() != b"obj": raise TailReadError("bad object header")
+                return lx.value()
+            val, _ = self.parse_at(a, obj)
+        elif kind == 2:
+            val = self._from_objstm(a, b)
+        else:
+            return None
+        return self.resolve(val, depth + 1) if isinstance(val, _Ref) else val
+
+    def _from_objstm(self, stm_num: int, index: int):
+        if stm_num not in self._objstm:
+            kind, off, _ = self.locate(stm_num)
+            if kind != 1: raise TailReadError("object stream not found")
+            d, data = self._stream(off)
+            lx = _Lexer(data + b" ")
+            pairs = [(lx.value(), lx.value()) for _ in range(int(d["/N"]))]
+            self._objstm[stm_num] = (int(d["/First"]), pairs, data)
+        first, pairs, data = self._objstm[stm_num]
+        return _Lexer(data + b" ", first + pairs[index][1]).value()
+
+def _png_unpredict(data: bytes, columns: int) -> bytes:
+    out, prev, row = bytearray(), bytearray(columns), columns + 1
+    for i in range(0, len(data), row):
+        ft, line = data[i], bytearray(data[i + 1:i + row])
+        for j in range(len(line)):
+            left = line[j - 1] if j else 0
+            if ft == 1: line[j] = (line[j] + left) & 0xFF
+            elif ft == 2: line[j] = (line[j] + prev[j]) & 0xFF
+            elif ft == 3: line[j] = (line[j] + ((left + prev[j]) >> 1)) & 0xFF
+            elif ft == 4:
+                p = left + prev[j] - (prev[j - 1] if j else 0)
+                pa, pb, pc = abs(p - left), abs(p - prev[j]), abs(p - (prev[j - 1] if j else 0))
+                line[j] = (line[j] + (left if pa <= pb and pa <= pc else prev[j] if pb <= pc else (prev[j - 1] if j else 0))) & 0xFF
+        out += line; prev = line
+    return bytes(out)
+
+def _text(v):
+    if isinstance(v, bytes): return str(create_string_object(v))
+    if isinstance(v, bool): return "true" if v else "false"
+    return v if isinstance(v, str) else str(v)
+
+def read_info(f) -> dict:
+    """قاموس Info (مفاتيح /Name → نص) بقراءة الذيل فقط. يرفع TailReadError عند الفشل."""
+    tr = _TailReader(f)
+    try:
+        trailer = tr.load().trailer()
+        if "/Encrypt" in trailer: raise TailReadError("encrypted PDF")
+        info = trailer.get("/Info")
+        if info is None: return {}
+        info = tr.resolve(info) if isinstance(info, _Ref) else info
+        if not isinstance(info, dict): raise TailReadError("/Info is not a dictionary")
+        return {k: _text(tr.resolve(v) if isinstance(v, _Ref) else v) for k, v in info.items()}
+    except (TailReadError, KeyError, ValueError, IndexError, TypeError, zlib.error) as e:
+        raise TailReadError(str(e)) from e
+    finally:
+        tr.close()
+
+# ================= قراءة/كتابة Metadata (بصيغة العرض dd/mm/YYYY) =================
+BASE_KEYS = ["/ModDate","/CreationDate","/Producer","/Title","/Author","/Subject","/Keywords","/Creator"]
+
+def pdf_date_to_display_date(s):
+    if not s or not isinstance(s, str): return ""
+    if s.startswith("D:"): s = s[2:]
+    m = re.match(r"^(\d{4})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})", s)
+    if m:
+        y,M,d,H,m_,sec = m.groups()
+        try: return datetime(int(y),int(M),int(d),int(H),int(m_),int(sec)).strftime("%d/%m/%Y, %H:%M:%S")
+        except: return s
+    return s
+
+def display_date_to_pdf_date(s):
+    try: return datetime.strptime(s,"%d/%m/%Y, %H:%M:%S").strftime("D:%Y%m%d%H%M%S+03'00'")
+    except: return s
+
+def parse_display_dt(s: str):
+    try:
+        dt = datetime.strptime(s.strip(), "%d/%m/%Y, %H:%M:%S")
+        return dt.date(), dt.time().replace(microsecond=0)
+    except Exception:
+        return None, None
+
+def read_meta(file):
+    # المسار السريع: trailer + /Info فقط من ذيل الملف؛ المحلّل الكامل للملفات التالفة
+    try:
+        with metrics.stages.time("pdf.read_tail"): md = read_info(file)
+    except TailReadError:
+        with metrics.stages.time("pdf.read_full"):
+            file.seek(0); r = PdfReader(file); md = r.metadata or {}
+    keys = BASE_KEYS + [k for k in md.keys() if k not in BASE_KEYS]
+    out = {}
+    for k in keys:
+        v = md.get(k, "")
+        out[k] = pdf_date_to_display_date(v) if k in ("/CreationDate","/ModDate") else v
+    return out, keys
+
+def write_meta(file, new_md, incremental=True, out=None):
+    # out: ملف الوجهة (مثلاً TemporaryFile للملفات الكبيرة)؛ الافتراضي BytesIO
+    final = {}
+    for k,v in new_md.items():
+        final[k] = display_date_to_pdf_date(v) if k in ("/CreationDate","/ModDate") else v
+    out = BytesIO() if out is None else out
+    if incremental:
+        # إلحاق كائن Info جديد + xref + trailer فقط بنهاية الملف الأصلي — نسخ متدفق بلا file.read()
+        try:
+            with metrics.stages.time("pdf.write_incremental"):
+                tail = info_update(file, final)
+                file.seek(0); shutil.copyfileobj(file, out, COPY_CHUNK)
+                out.write(tail); out.seek(0); return out
+        except IncrementalUnsupported:
+            pass
+    with metrics.stages.time("pdf.write_rewrite"):
+        file.seek(0)
+        r = PdfReader(file); w = PdfWriter()
+        for p in r.pages: w.add_page(p)
+        w.add_metadata(final)
+        w.write(out); out.seek(0); return out
+
+# ================= ذاكرة التحليل حسب بصمة المحتوى =================
+COPY_CHUNK = 1 << 20
+PARSE_CACHE_MAX = 256
+
+_parsed = OrderedDict()  # sha256 → (md, keys)
+_parsed_lock = threading.Lock()
+
+def content_hash(f) -> str:
+    f.seek(0); h = hashlib.sha256()
+    for chunk in iter(lambda: f.read(COPY_CHUNK), b""): h.update(chunk)
+    f.seek(0)
+    return h.hexdigest()
+
+def read_meta_cached(file, digest: str = None):
+    """(البصمة, md, keys) — ملفان بالاسم نفسه ومحتوى مختلف لا يتشاركان النتيجة."""
+    digest = digest or content_hash(file)
+    with _parsed_lock:
+        hit = _parsed.get(digest)
+        if hit is not None: _parsed.move_to_end(digest)
+    if hit is None:
+        hit = read_meta(file)
+        with _parsed_lock:
+            _parsed[digest] = hit
+            while len(_parsed) > PARSE_CACHE_MAX: _parsed.popitem(last=False)
+    md, keys = hit
+    return digest, dict(md), list(keys)
+
+# ================= قواعد التعديل الجماعي =================
+DISPLAY_FMT = "%d/%m/%Y, %H:%M:%S"
+
+def apply_rules(md: dict, rules: dict) -> dict:
+    """يطبّق قواعد الدفعة على قاموس بصيغة العرض (كما يعيده read_meta).
+
+    rules: set={مفتاح: قيمة}, shift=timedelta لـ CreationDate/ModDate,
+    sync_moddate=True ليصبح ModDate = CreationDate.
+    """
+    out = dict(md)
+    out.update(rules.get("set") or {})
+    shift = rules.get("shift")
+    if shift:
+        for k in ("/CreationDate", "/ModDate"):
+            try: out[k] = (datetime.strptime(out.get(k, "").strip(), DISPLAY_FMT) + shift).strftime(DISPLAY_FMT)
+            except ValueError: pass
+    if rules.get("sync_moddate") and out.get("/CreationDate"):
+        out["/ModDate"] = out["/CreationDate"]
+    return out
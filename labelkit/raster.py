@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# ================= صيغ الإخراج النقطية للرموز أبيض/أسود =================
+# الرموز ثنائية اللون، فنحفظها دائماً من صورة "1" (بت واحد للبكسل):
+#   png          PNG أحادي البت، مستوى zlib قابل للضبط (0..9)
+#   png-palette  PNG بلوحة ألوان من لونين (1 بت/بكسل) — للأنظمة التي لا تقبل PNG الرمادي
+#   tiff-g4      TIFF بضغط CCITT Group 4 للأرشفة (أصغر حجم للرموز الكبيرة)
+from io import BytesIO
+
+from PIL import Image
+
+FORMATS = {
+    "png":         ("image/png", ".png"),
+    "png-palette": ("image/png", ".png"),
+    "tiff-g4":     ("image/tiff", ".tif"),
+}
+DEFAULT_FORMAT = "png"
+ZLIB_LEVEL = 6  # افتراضي Pillow؛ 9 يوفّر ~4% بوقت أطول بمرتين ونصف
+_PALETTE = [0, 0, 0, 255, 255, 255]  # 0 = أسود، 1 = أبيض (نفس قيم الصورة "1")
+
+def check_format(fmt: str) -> str:
+    if fmt not in FORMATS: raise ValueError(f"unknown raster format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    return fmt
+
+def mime(fmt: str) -> str: return FORMATS[check_format(fmt)][0]
+
+def ext(fmt: str) -> str: return FORMATS[check_format(fmt)][1]
+
+def encode(im: Image.Image, fmt: str = DEFAULT_FORMAT, zlib_level: int = ZLIB_LEVEL, dpi: int = None) -> bytes:
+    """صورة "1" → بايتات بالصيغة المطلوبة."""
+    check_format(fmt)
+    if im.mode != "1": im = im.convert("1", dither=Image.Dither.NONE)
+    extra = {"dpi": (dpi, dpi)} if dpi else {}
+    out = BytesIO()
+    if fmt == "png":
+        im.save(out, format="PNG", compress_level=zlib_level, **extra)
+    elif fmt == "png-palette":
+        p = im.convert("L").point(lambda v: 1 if v else 0).convert("P")  # convert("P") يضع لوحة 256 لوناً
+        p.putpalette(_PALETTE)
+        p.save(out, format="PNG", bits=1, compress_level=zlib_level, **extra)
+    else:
+        im.save(out, format="TIFF", compression="group4", **extra)
+    return out.getvalue()
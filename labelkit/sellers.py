@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# ================= سجل البائعين الدائم (SQLite WAL + ذاكرة قراءة) =================
+# مشترك بين كل المشغّلين والجلسات، ويبقى بعد إغلاق المتصفح. القراءة من قاموس في
+# الذاكرة (O(1))، ويُحدَّث تزايدياً فقط عندما يكتب أحدهم (PRAGMA data_version).
+# البحث أثناء الكتابة: مصفوفتان مرتبتان (الأرقام الضريبية، وكلمات الأسماء بعد التطبيع)
+# مع bisect — تُبنى عند إنشاء السجل وتُحدَّث تزايدياً بعد ذلك. دفعة كبيرة من كاتب آخر تجعلها
+# قديمة فقط (مسار القراءة get/len لا يعيد البناء)، ويعيد البحث التالي بناءها.
+import bisect, csv, io, os, re, sqlite3, threading
+from functools import lru_cache
+
+from labelkit.zatca import _clean_vat
+
+DB_ENV = "LABELKIT_SELLERS_DB"
+REBUILD_OVER = 2000  # دفعة أكبر من هذا → إعادة بناء الفهرس بدل الإدراج واحداً واحداً
+
+# ---------- تطبيع الأسماء العربية ----------
+_FOLD = {ord(a): b for a, b in {
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ة": "ه", "ى": "ي", "ؤ": "و", "ئ": "ي", "ء": "",
+    "\u0640": "",  # التطويل
+}.items()}
+_FOLD.update({c: None for c in range(0x064B, 0x0660)})  # التشكيل
+_FOLD[0x0670] = None  # الألف الخنجرية
+_FOLD.update({0x0660 + i: str(i) for i in range(10)})
+_WORD = re.compile(r"\w+")
+
+def normalize_name(s: str) -> str:
+    """يوحّد الألف/الهمزة والتاء المربوطة والياء ويحذف التشكيل والتطويل."""
+    return (s or "").casefold().translate(_FOLD)
+
+def name_tokens(s: str) -> list:
+    return _WORD.findall(normalize_name(s))
+
+def bare(t: str) -> str:
+    """الكلمة بلا "ال" التعريف (إن بقي بعدها حرفان على الأقل)."""
+    return t[2:] if t.startswith("ال") and len(t) > 3 else t
+
+def index_tokens(s: str) -> set:
+    """كلمات الاسم كما هي + كل كلمة بلا "ال"؛ ومع تجريد كلمات الاستعلام بـ bare يتطابق
+    "اتقان" و "الإتقان" في الاتجاهين."""
+    toks = set(name_tokens(s))
+    return toks | {bare(t) for t in toks}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sellers (
+    vat  TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    seq  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sellers_seq ON sellers(seq);
+"""
+
+class SellerRegistry:
+    def __init__(self, path: str):
+        self.path = path
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._names = {}
+        self._vats = None    # أرقام مرتبة
+        self._tokens = None  # ["كلمة\0رقم"] مرتبة — مفاتيح نصية أسرع في الترتيب من الأزواج
+        self._seq = -1
+        self._version = None
+        self._refresh()
+        self._index()  # هنا لا في أول بحث: بناء الفهرس لسجل كبير يستغرق ثوانٍ
+
+    # ---------- قراءة ----------
+    def _refresh(self):
+        # data_version يتغيّر فقط عند كتابة اتصال آخر — استعلام رخيص في كل قراءة
+        v = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if v == self._version: return
+        rows = self._db.execute("SELECT vat, name, seq FROM sellers WHERE seq > ?", (self._seq,)).fetchall()
+        self._apply([(vat, name) for vat, name, _ in rows])
+        for _, _, seq in rows:
+            if seq > self._seq: self._seq = seq
+        self._version = v
+
+    def _apply(self, rows):
+        # تحديث القاموس والفهرس معاً (تحت القفل)؛ الدفعة الكبيرة تجعل الفهرس قديماً (None) فقط
+        if self._vats is not None and len(rows) > REBUILD_OVER:
+            self._vats = self._tokens = None
+        for vat, name in rows:
+            old = self._names.get(vat)
+            self._names[vat] = name
+            if self._vats is None or old == name: continue
+            if old is None: bisect.insort(self._vats, vat)
+            else:
+                for t in index_tokens(old):
+                    k = f"{t}\0{vat}"
+                    i = bisect.bisect_left(self._tokens, k)
+                    if i < len(self._tokens) and self._tokens[i] == k: del self._tokens[i]
+            for t in index_tokens(name): bisect.insort(self._tokens, f"{t}\0{vat}")
+
+    def _index(self):
+        if self._vats is None:
+            self._vats = sorted(self._names)
+            self._tokens = sorted({f"{t}\0{vat}" for vat, name in self._names.items() for t in index_tokens(name)})
+
+    def get(self, vat: str):
+        with self._lock:
+            self._refresh()
+            return self._names.get(_clean_vat(vat))
+
+    def __len__(self):
+        with self._lock:
+            self._refresh(); return len(self._names)
+
+    def count(self) -> int:
+        """عدد البائعين من SQLite مباشرة (COUNT(*)) — بلا مزامنة الذاكرة، لعرضه في كل إعادة تشغيل."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sellers").fetchone()[0]
+
+    def items(self):
+        with self._lock:
+            self._refresh(); return list(self._names.items())
+
+    # ---------- بحث ----------
+    def search(self, query: str, limit: int = 10, scan: int = 5000) -> list:
+        """[(رقم, اسم)] — أرقام فقط: بادئة الرقم الضريبي؛ وإلا كل كلمة في الاستعلام
+        يجب أن تكون بادئة لكلمة في الاسم بعد التطبيع، بـ "ال" أو بدونها (ترتيب الكلمات غير مهم)."""
+        q = (query or "").strip()
+        if not q: return []
+        with self._lock:
+            self._refresh(); self._index()
+            digits = re.sub(r"\s", "", q.translate(_FOLD))
+            if digits.isascii() and digits.isdigit():
+                i = bisect.bisect_left(self._vats, digits)
+                out = []
+                for vat in self._vats[i:i + limit]:
+                    if not vat.startswith(digits): break
+                    out.append((vat, self._names[vat]))
+                return out
+            words = {bare(w) for w in name_tokens(q)}
+            if not words: return []
+            # نمسح مدى الكلمة الأضيق في الفهرس (بحثان ثنائيان لكل كلمة)، لا الأطول: "تجاريه"
+            # قد تطابق نصف السجل بينما "امل" تطابق بضعة أسماء
+            spans = {w: (bisect.bisect_left(self._tokens, w), bisect.bisect_left(self._tokens, w + "\U0010ffff"))
+                     for w in words}
+            head = min(words, key=lambda w: spans[w][1] - spans[w][0])
+            rest = words - {head}
+            i, j = spans[head]
+            out, seen = [], set()
+            for k in self._tokens[i:min(j, i + scan)]:
+                vat = k[k.index("\0") + 1:]
+                if vat in seen: continue
+                seen.add(vat)
+                if rest:
+                    toks = index_tokens(self._names[vat])
+                    if not all(any(x.startswith(w) for x in toks) for w in rest): continue
+                out.append((vat, self._names[vat]))
+                if len(out) >= limit: break
+            return out
+
+    # ---------- كتابة ----------
+    def put(self, vat: str, name: str) -> bool:
+        return self.put_many([(vat, name)]) == 1
+
+    def put_many(self, pairs) -> int:
+        """إدراج/تحديث دفعة واحدة داخل معاملة. يتجاهل الأرقام غير المكوّنة من 15 رقماً."""
+        rows = []
+        for vat, name in pairs:
+            vat, name = _clean_vat(vat), (name or "").strip()
+            if len(vat) == 15 and name: rows.append((vat, name))
+        if not rows: return 0
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # قفل الكتابة مُمسك: نلتقط أولاً ما كتبه الآخرون منذ آخر تحديث، وإلا تجاوز
+                # _seq أدناه صفوفهم ولن تصل إلى ذاكرة هذه العملية أبداً
+                self._refresh()
+                seq = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM sellers").fetchone()[0]
+                self._db.executemany(
+                    "INSERT INTO sellers(vat, name, seq) VALUES (?, ?, ?) "
+                    "ON CONFLICT(vat) DO UPDATE SET name = excluded.name, seq = excluded.seq",
+                    ((vat, name, seq + i + 1) for i, (vat, name) in enumerate(rows)))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK"); raise
+            # كتاباتنا لا تغيّر data_version لهذا الاتصال — نحدّث الذاكرة مباشرة
+            self._apply(rows)
+            self._seq = max(self._seq, seq + len(rows))
+            if len(rows) > REBUILD_OVER: self._index()  # استيرادنا الكبير يدفع كلفة إعادة البناء هنا
+        return len(rows)
+
+    # ---------- استيراد/تصدير ----------
+    def import_csv(self, fileobj, batch: int = 10_000) -> int:
+        """CSV بعمودين (vat_number, seller) — مع أو بدون ترويسة."""
+        text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+        n, buf = 0, []
+        try:
+            for row in csv.reader(text):
+                if len(row) < 2: continue
+                buf.append((row[0], row[1]))
+                if len(buf) >= batch:
+                    n += self.put_many(buf); buf = []
+            n += self.put_many(buf)
+        finally:
+            text.detach()
+        return n
+
+    def export_csv(self) -> bytes:
+        out = io.StringIO()
+        w = csv.writer(out); w.writerow(["vat_number", "seller"])
+        w.writerows(sorted(self.items()))
+        return out.getvalue().encode("utf-8-sig")
+
+@lru_cache(maxsize=None)
+def registry(path: str = None) -> SellerRegistry:
+    # نسخة واحدة لكل عملية ولكل مسار
+    return SellerRegistry(path or os.environ.get(DB_ENV, "sellers.db"))
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# ================= خدمة HTTP محلية لرسم QR و Code128 =================
+# واجهة asyncio خفيفة (مكتبة قياسية فقط) + مجموعة عمليات للرسم:
+#   GET /qr?seller=..&vat=<الرقم الضريبي>&timestamp=..&total=..&vat_amount=..   (أو /qr?b64=..)
+#   GET /code128?data=..
+#   (اختياري في الاثنين: &format=png|png-palette|tiff-g4|svg|pdf|zpl)
+#   GET /healthz
+#   GET /metrics   (هستوغرامات توقيت المراحل بصيغة Prometheus النصية)
+#   GET /static/theme.css | /static/theme.js   (ملفات التصميم — راجع labelkit/theme.py)
+# الاستجابات تحمل ETag (تجزئة المحتوى) و Cache-Control طويل، و If-None-Match → 304 بدون رسم.
+#   python -m labelkit.server --port 8765 --workers 4
+import argparse, asyncio, json, os
+from urllib.parse import urlsplit, parse_qs
+
+from labelkit import bulk, cache, code128, metrics, output, theme, zatca
+
+MAX_HEADER = 16 * 1024
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+_STATIC_TYPES = {".css": "text/css; charset=utf-8", ".js": "text/javascript; charset=utf-8"}
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+def _render(kind: str, payload: str, fmt: str = output.DEFAULT_FORMAT):
+    # يعمل داخل عمليات المجموعة؛ يعيد توقيتات المراحل مع الصورة لتُدمج في سجل العملية الأم
+    png = output.qr_bytes(payload, fmt) if kind == "qr" else output.code128_bytes(payload, fmt)
+    return png, metrics.stages.drain()
+
+def _params(kind: str, fmt: str = output.DEFAULT_FORMAT):
+    if kind == "qr": return (zatca.QR_VERSION, zatca.QR_BORDER, zatca.QR_PX, fmt)
+    return (code128.WIDTH_IN, code128.HEIGHT_IN, code128.DPI, fmt)
+
+def payload_for(path: str, q: dict):
+    """(kind, payload) من المسار والاستعلام، أو ValueError برسالة للعميل."""
+    one = lambda k, d="": q.get(k, [d])[0]
+    if path == "/qr":
+        # سعة الرمز خطأ من العميل (400)، لا خطأ رسم (500)
+        if one("b64"): return "qr", zatca.check_capacity(one("b64"))
+        # بدون قيمة افتراضية من الساعة: نفس الرابط يجب أن يعطي نفس البايتات (ETag + immutable)
+        if not one("timestamp"): raise ValueError("timestamp is required")
+        rec = {
+            "seller": one("seller"), "vat_number": one("vat") or one("vat_number"),
+            "timestamp": one("timestamp"),
+            "total": one("total", "0"), "vat": one("vat_amount", "0"),
+        }
+        return "qr", zatca.check_capacity(zatca.ledger_payload(rec))
+    if path == "/code128":
+        s = code128.sanitize(one("data"))
+        if not s: raise ValueError("data is empty after sanitize")
+        return "code128", s
+    raise LookupError(path)
+
+class RenderServer:
+    def __init__(self, workers: int = 0):
+        self.pool = bulk.pool(workers)
+        self.cache = cache.images
+        self.served = 0
+        self.static = {}
+
+    async def render(self, kind: str, payload: str, key: str, fmt: str = output.DEFAULT_FORMAT) -> bytes:
+        png = self.cache.get(key)
+        if png is None:
+            with metrics.stages.time(f"server.render.{kind}"):
+                png, timings = await asyncio.get_running_loop().run_in_executor(self.pool, _render, kind, payload, fmt)
+            metrics.stages.merge(timings)
+            self.cache.put(key, png)
+        return png
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try: head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError): return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 400, b"header too large", close=True); return
+                lines = head.decode("latin-1").split("\r\n")
+                try: method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._send(writer, 400, b"bad request line", close=True); return
+                headers = {}
+                for ln in lines[1:]:
+                    if ":" in ln:
+                        k, v = ln.split(":", 1); headers[k.strip().lower()] = v.strip()
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                # لا نقرأ أجسام الطلبات: طلب بجسم (أو بغير GET/HEAD) يُغلق اتصاله بعد الرد، وإلا
+                # قُرئ جسمه كطلب تالٍ على نفس الاتصال
+                if method not in ("GET", "HEAD") or "content-length" in headers or "transfer-encoding" in headers:
+                    close = True
+                await self.respond(writer, method, target, headers, close)
+                if close: return
+        finally:
+            writer.close()
+
+    async def respond(self, writer, method, target, headers, close):
+        if method not in ("GET", "HEAD"):
+            return await self._send(writer, 405, b"method not allowed", close=close)
+        url = urlsplit(target)
+        if url.path == "/healthz":
+            body = json.dumps({"ok": True, "served": self.served, "cache": self.cache.stats()}).encode()
+            return await self._send(writer, 200, body, "application/json", close=close)
+        if url.path == "/metrics":
+            body = metrics.stages.prometheus().encode()
+            return await self._send(writer, 200, body, "text/plain; version=0.0.4; charset=utf-8", close=close)
+        if url.path.startswith("/static/"):
+            return await self.send_static(writer, method, url.path[len("/static/"):], headers, close)
+        query = parse_qs(url.query)
+        try:
+            kind, payload = payload_for(url.path, query)
+            fmt = output.check_format(query.get("format", [output.DEFAULT_FORMAT])[0])
+        except LookupError:
+            return await self._send(writer, 404, b"not found", close=close)
+        except ValueError as e:
+            body = json.dumps({"error": str(e)}, ensure_ascii=False).encode()
+            return await self._send(writer, 400, body, "application/json", close=close)
+        key = self.cache.key(kind, payload, _params(kind, fmt))
+        etag = f'"{key[:32]}"'
+        extra = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+            return await self._send(writer, 304, b"", None, extra, close, head_only=True)
+        try: png = await self.render(kind, payload, key, fmt)
+        except Exception as e:
+            return await self._send(writer, 500, str(e).encode(), close=close)
+        self.served += 1
+        await self._send(writer, 200, png, output.mime(fmt), extra, close, head_only=method == "HEAD")
+
+    async def send_static(self, writer, method, name, headers, close):
+        if name not in theme.ASSETS:
+            return await self._send(writer, 404, b"not found", close=close)
+        if name not in self.static:
+            with open(os.path.join(theme.STATIC_DIR, name), "rb") as f: self.static[name] = f.read()
+        extra = {"ETag": f'"{theme.version(name)}"', "Cache-Control": CACHE_CONTROL}
+        if extra["ETag"] in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+            return await self._send(writer, 304, b"", None, extra, close, head_only=True)
+        ctype = _STATIC_TYPES[os.path.splitext(name)[1]]
+        await self._send(writer, 200, self.static[name], ctype, extra, close, head_only=method == "HEAD")
+
+    async def _send(self, writer, status, body, ctype="text/plain; charset=utf-8", extra=None, close=False, head_only=False):
+        hdr = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", f"Content-Length: {len(body)}"]
+        if ctype: hdr.append(f"Content-Type: {ctype}")
+        hdr += [f"{k}: {v}" for k, v in (extra or {}).items()]
+        hdr.append("Connection: close" if close else "Connection: keep-alive")
+        writer.write(("\r\n".join(hdr) + "\r\n\r\n").encode("latin-1"))
+        if body and not head_only: writer.write(body)
+        await writer.drain()
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, workers: int = 0):
+    app = RenderServer(workers)
+    server = await asyncio.start_server(app.handle, host, port, limit=MAX_HEADER)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        app.pool.shutdown(cancel_futures=True)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m labelkit.server", description="HTTP rendering service for ZATCA QR and Code128")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=bulk.default_workers())
+    args = ap.parse_args(argv)
+    try: asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt: pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# ================= تركيب أوراق الملصقات (PDF متعدد الصفحات في تمريرة واحدة) =================
+# يرص رموز Code128 و/أو ZATCA QR على قالب A4 أو رول ملصقات، كل رمز صورة أحادية البت
+# مرسومة بدقة DPI الحالية بمقاسها الفعلي على الورقة. الـ PDF يُكتب صفحة بصفحة إلى الملف:
+# كل صورة تُكتب فور وصولها (بالترتيب) وتُنسى، ولا يبقى في الذاكرة إلا مواضع الصفحة الحالية
+# وإزاحات الكائنات (xref) — فالذاكرة ثابتة تقريباً سواء كانت المهمة 100 ملصق أو 10,000.
+import zlib
+
+from labelkit import bulk, code128, vector, zatca
+
+MM = 72 / 25.4  # نقاط PDF لكل مم
+PAD_MM = 1.5    # أقل مسافة بيضاء بين الرمز وحافة الملصق
+
+# الاسم: (الوصف, مقاس الصفحة مم, أعمدة×صفوف, مقاس الملصق مم, الهامش الأيسر/العلوي مم, الفجوة أفقياً/رأسياً مم)
+TEMPLATES = {
+    "a4-3x8":       ("A4 — 3×8 (70×37 مم)",        (210, 297), (3, 8),  (70, 37),      (0, 0.5),      (0, 0)),
+    "a4-2x7":       ("A4 — 2×7 (99.1×38.1 مم)",    (210, 297), (2, 7),  (99.1, 38.1),  (4.65, 15.15), (2.5, 0)),
+    "a4-4x10":      ("A4 — 4×10 (48.5×25.4 مم)",   (210, 297), (4, 10), (48.5, 25.4),  (8, 21.5),     (0, 0)),
+    "roll-50x25":   ("رول — 50×25 مم",             (50, 25),   (1, 1),  (50, 25),      (0, 0),        (0, 0)),
+    "roll-100x150": ("رول — 100×150 مم (4×6 بوصة)", (100, 150), (1, 1),  (100, 150),    (0, 0),        (0, 0)),
+}
+DEFAULT_TEMPLATE = "a4-3x8"
+KINDS = ("code128", "qr")
+
+def check_template(name: str) -> str:
+    if name not in TEMPLATES: raise ValueError(f"unknown sheet template {name!r} (expected one of {', '.join(TEMPLATES)})")
+    return name
+
+def _fit(w_in: float, h_in: float, box_w_in: float, box_h_in: float):
+    # تصغير فقط (مع الحفاظ على النسبة) إذا كان الرمز أكبر من الملصق — لا تكبير
+    k = min(1.0, box_w_in / w_in, box_h_in / h_in)
+    return w_in * k, h_in * k
+
+def symbol_sizes(template: str) -> dict:
+    """{النوع: (العرض, الارتفاع) بالبوصة} — مقاس كل رمز كما سيُطبع على هذا القالب."""
+    cw, ch = TEMPLATES[check_template(template)][3]
+    box_w, box_h = (cw - 2 * PAD_MM) / 25.4, (ch - 2 * PAD_MM) / 25.4
+    return {
+        "code128": _fit(code128.WIDTH_IN, code128.HEIGHT_IN, box_w, box_h),
+        "qr": _fit(vector.QR_SIZE_IN, vector.QR_SIZE_IN, box_w, box_h),
+    }
+
+# ================= رسم الرمز (داخل عمليات المجموعة) =================
+def _symbol_job(item):
+    # صورة "1" بدقة dpi بمقاسها النهائي → صفوف مضغوطة (1 بت/بكسل، 1 = أبيض كما في DeviceGray)
+    seq, n, kind, value, w_in, h_in, dpi = item
+    if kind == "code128":
+        im = code128.render_image(value, w_in, h_in, dpi)
+    else:
+        b64 = value if isinstance(value, str) else zatca.ledger_payload(value)
+        im = zatca.matrix_image(zatca.qr_matrix(b64), int(w_in * dpi))
+    return im.size, zlib.compress(im.tobytes(), 6)
+
+# ================= كاتب PDF متدفق =================
+class _PdfStream:
+    # الكائن 1 = Catalog و 2 = Pages يُكتبان في النهاية (بعد معرفة كل الصفحات)؛ الباقي فور تكوّنه
+    def __init__(self, out):
+        self.out, self.pos = out, 0
+        self.offsets = [0, None, None]
+        self.kids = []
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, b: bytes):
+        self.out.write(b); self.pos += len(b)
+
+    def obj(self, body: bytes, num: int = None) -> int:
+        if num is None:
+            self.offsets.append(None); num = len(self.offsets) - 1
+        self.offsets[num] = self.pos
+        self._write(b"%d 0 obj\n" % num + body + b"\nendobj\n")
+        return num
+
+    def stream(self, head: bytes, data: bytes) -> int:
+        return self.obj(b"<< %s /Length %d >>\nstream\n" % (head, len(data)) + data + b"\nendstream")
+
+    def image(self, size, data: bytes) -> int:
+        return self.stream(b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                           b"/BitsPerComponent 1 /Filter /FlateDecode" % size, data)
+
+    def page(self, w_pt: float, h_pt: float, placed: list):
+        # placed: [(رقم كائن الصورة, x, y, w, h)] بالنقاط، الأصل أسفل اليسار
+        content = " ".join(f"q {vector._num(w)} 0 0 {vector._num(h)} {vector._num(x)} {vector._num(y)} cm /I{num} Do Q"
+                           for num, x, y, w, h in placed).encode("ascii")
+        contents = self.stream(b"/Filter /FlateDecode", zlib.compress(content, 6))
+        xobjects = b" ".join(b"/I%d %d 0 R" % (num, num) for num, *_ in placed)
+        self.kids.append(self.obj(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %s %s] /Resources << /XObject << %s >> >> "
+                                  b"/Contents %d 0 R >>" % (vector._num(w_pt).encode(), vector._num(h_pt).encode(), xobjects, contents)))
+
+    def close(self):
+        self.obj(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in self.kids), len(self.kids)), 2)
+        self.obj(b"<< /Type /Catalog /Pages 2 0 R >>", 1)
+        xref = self.pos
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % len(self.offsets))
+        self._write(b"".join(b"%010d 00000 n \n" % off for off in self.offsets[1:]))
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(self.offsets), xref))
+
+def _in_order(results):
+    # imap_bounded يعيد النتائج فور انتهائها؛ الورقة تحتاج ترتيب الإدخال. المخزن المؤقت هنا
+    # محدود بعدد الدفعات المعلّقة في imap_bounded، لا بحجم المهمة
+    held, nxt = {}, 0
+    for res in results:
+        held[res[0][0]] = res
+        while nxt in held:
+            yield held.pop(nxt); nxt += 1
+
+def compose(items, out, template: str = DEFAULT_TEMPLATE, workers: int = 0, errors: list = None,
+            dpi: int = code128.DPI, skip: int = 0):
+    """يرص الملصقات على صفحات القالب ويكتب PDF واحداً إلى out (ملف ثنائي فارغ).
+
+    items: (رقم السطر, النوع, القيمة) — النوع code128 (نص يُنظَّف هنا) أو qr (سجل فاتورة
+    dict أو حمولة base64 جاهزة). skip: عدد الخانات الفارغة في أول صفحة (ورقة مستعملة جزئياً).
+    يعيد مولّداً لعدد الملصقات المنجزة؛ المرفوضة تُضاف إلى errors كـ (رقم السطر, القيمة, السبب).
+    """
+    errors = [] if errors is None else errors
+    _, (pw, ph), (cols, rows), (cw, ch), (left, top), (gx, gy) = TEMPLATES[check_template(template)]
+    sizes, slots = symbol_sizes(template), cols * rows
+
+    def jobs():
+        seq = 0
+        for n, kind, value in items:
+            if isinstance(value, Exception):
+                errors.append((n, "", f"JSON: {value}")); continue
+            if kind not in KINDS:
+                errors.append((n, str(value), f"نوع غير معروف: {kind}")); continue
+            if kind == "code128":
+                value = code128.sanitize(value)
+                if not value:
+                    errors.append((n, "", "قيمة فارغة بعد التنظيف")); continue
+            yield (seq, n, kind, value, *sizes[kind], dpi); seq += 1
+
+    pdf, placed, slot, done = _PdfStream(out), [], skip % slots, 0
+    for (_, n, kind, value, w_in, h_in, _), res, err in _in_order(bulk.imap_bounded(_symbol_job, jobs(), workers)):
+        done += 1
+        if err is not None:
+            errors.append((n, value if isinstance(value, str) else zatca._field(value, "invoice"), err))
+            yield done; continue
+        row, col = divmod(slot, cols)
+        w, h = w_in * 72, h_in * 72
+        x = (left + col * (cw + gx)) * MM + (cw * MM - w) / 2
+        y = (ph - top - row * (ch + gy) - ch) * MM + (ch * MM - h) / 2
+        placed.append((pdf.image(*res), x, y, w, h))
+        slot += 1
+        if slot == slots:
+            pdf.page(pw * MM, ph * MM, placed); placed, slot = [], 0
+        yield done
+    if placed or not pdf.kids: pdf.page(pw * MM, ph * MM, placed)  # صفحة فارغة إن رُفض كل شيء
+    pdf.close()
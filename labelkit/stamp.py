@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# ================= ختم رمز ZATCA QR على الصفحة الأولى من فاتورة PDF =================
+# PdfReader + PdfWriter(incremental=True): بايتات الملف الأصلي تُنسخ كما هي ويُلحق بها تحديث
+# صغير فيه الصفحة الأولى (Resources و Contents فقط) + XObject الرمز + تياران صغيران (q … Q)،
+# فلا يُعاد تسلسل بقية الصفحات والتوقيعات الرقمية السابقة تبقى صالحة لأن التحديث إلحاق فقط.
+# لكن الكلفة ليست ثابتة: PdfWriter التزايدي في pypdf يحمّل كل كائنات الملف وينسخها ويحسب
+# hash_bin لكل منها ليعرف ما تغيّر — أي تحليل كامل يتناسب مع حجم المستند (≈ 0.5 ث لـ 3000
+# صفحة)، بخلاف pdfmeta.info_update الذي يقرأ الذيل فقط.
+import zlib
+from io import BytesIO
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.errors import PyPdfError
+from pypdf.generic import (
+    ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject, NameObject, NumberObject, StreamObject,
+)
+
+from labelkit import metrics, vector as vec, zatca
+
+ANCHORS = ("top-left", "top-right", "bottom-left", "bottom-right")
+DEFAULT_ANCHOR = "top-left"
+MARGIN_MM = 10.0   # المسافة من حافتي الزاوية (من صندوق القص CropBox كما يظهر للقارئ)
+SIZE_MM = 25.0     # ضلع الرمز شاملاً الهامش الأبيض
+MM = 72 / 25.4
+_XOBJECT_NAME = "/ZatcaQR"
+
+def check_anchor(anchor: str) -> str:
+    if anchor not in ANCHORS: raise ValueError(f"unknown anchor {anchor!r} (expected one of {', '.join(ANCHORS)})")
+    return anchor
+
+def _stream(data: bytes, **entries) -> StreamObject:
+    s = StreamObject()
+    s._data = zlib.compress(data, 9)
+    s.update({NameObject("/Filter"): NameObject("/FlateDecode"), **{NameObject("/" + k): v for k, v in entries.items()}})
+    return s
+
+def qr_xobject(b64: str, vector: bool = True) -> StreamObject:
+    """XObject للرمز في مربع الوحدة (يُكبَّر بـ cm عند الرسم).
+
+    vector: Form من مستطيلات (مثل labelkit.vector.qr_pdf)، وإلا صورة أحادية البت بنفس بكسلات make_qr.
+    """
+    m = zatca.qr_matrix(b64)
+    if not vector:
+        im = zatca.matrix_image(m)
+        return _stream(im.tobytes(), Type=NameObject("/XObject"), Subtype=NameObject("/Image"),
+                       Width=NumberObject(im.size[0]), Height=NumberObject(im.size[1]),
+                       ColorSpace=NameObject("/DeviceGray"), BitsPerComponent=NumberObject(1))
+    n = m.shape[0]
+    rects = [(x, y, k, 1) for y, row in enumerate(m.tolist()) for x, k in vec._runs(row)]
+    content = f"1 g 0 0 {n} {n} re f ".encode("ascii") + vec._rects(n, n, n, n, rects)
+    unit = [NumberObject(0), NumberObject(0), NumberObject(n), NumberObject(n)]
+    return _stream(content, Type=NameObject("/XObject"), Subtype=NameObject("/Form"), BBox=ArrayObject(unit),
+                   Matrix=ArrayObject([FloatObject(1 / n), NumberObject(0), NumberObject(0),
+                                       FloatObject(1 / n), NumberObject(0), NumberObject(0)]),
+                   Resources=DictionaryObject())
+
+def position(page, anchor: str = DEFAULT_ANCHOR, margin_mm: float = MARGIN_MM, size_mm: float = SIZE_MM):
+    """(x, y) للزاوية السفلى اليسرى للرمز في فضاء المستخدم، مع مراعاة /Rotate حتى تقع
+    الزاوية المطلوبة حيث يراها القارئ. رمز QR يُقرأ بأي اتجاه فلا داعي لتدويره."""
+    check_anchor(anchor)
+    box = page.cropbox
+    x0, y0, w, h = float(box.left), float(box.bottom), float(box.width), float(box.height)
+    m, s = margin_mm * MM, size_mm * MM
+    rot = page.rotation % 360
+    dw, dh = (h, w) if rot in (90, 270) else (w, h)
+    dx = m if anchor.endswith("left") else dw - m - s
+    dy = m if anchor.startswith("bottom") else dh - m - s
+    if rot == 90: ux, uy = w - dy - s, dx
+    elif rot == 180: ux, uy = w - dx - s, h - dy - s
+    elif rot == 270: ux, uy = dy, h - dx - s
+    else: ux, uy = dx, dy
+    return x0 + ux, y0 + uy
+
+def _resources(page) -> DictionaryObject:
+    # /Resources قد تكون موروثة من عقدة Pages أعلى الشجرة
+    node = page
+    while node is not None:
+        if "/Resources" in node: return node["/Resources"]
+        node = node.get("/Parent")
+    return DictionaryObject()
+
+def _stamp_page(w: PdfWriter, page, xobj: StreamObject, x: float, y: float, s: float):
+    # نسخ سطحية لقاموسي Resources/XObject: لا نعدّل قاموساً مشتركاً مع صفحات أخرى
+    res = DictionaryObject(_resources(page))
+    xobjects = DictionaryObject(res.get("/XObject", DictionaryObject()))
+    name, i = _XOBJECT_NAME, 0
+    while name in xobjects:
+        i += 1; name = f"{_XOBJECT_NAME}{i}"
+    xobjects[NameObject(name)] = w._add_object(xobj)
+    res[NameObject("/XObject")] = xobjects
+    page[NameObject("/Resources")] = res
+
+    # q قبل المحتوى الأصلي و Q بعده حتى لا تؤثر أي حالة رسم متروكة مفتوحة على موضع الرمز
+    head, tail = DecodedStreamObject(), DecodedStreamObject()
+    head.set_data(b"q\n")
+    tail.set_data(f"\nQ q {vec._num(s)} 0 0 {vec._num(s)} {vec._num(x)} {vec._num(y)} cm {name} Do Q\n".encode("ascii"))
+    parts = []
+    if "/Contents" in page:
+        old = page.raw_get("/Contents")  # مرجع غير محلول: التيارات الأصلية تبقى كما هي
+        parts = list(old.get_object()) if isinstance(old.get_object(), ArrayObject) else [old]
+    page[NameObject("/Contents")] = ArrayObject([w._add_object(head), *parts, w._add_object(tail)])
+
+def stamp_pdf(file, b64: str, anchor: str = DEFAULT_ANCHOR, margin_mm: float = MARGIN_MM, size_mm: float = SIZE_MM,
+              vector: bool = True, incremental: bool = True, out=None):
+    """يختم رمز الحمولة b64 على الصفحة الأولى ويعيد (out, "incremental" | "rewrite").
+
+    out: ملف الوجهة (الافتراضي BytesIO). الوضعان كلاهما يحلّلان المستند كاملاً؛ الفرق أن
+    التزايدي يُلحق الكائنات المتغيّرة فقط. إن تعذّر يُعاد بناء الملف كاملاً بـ PdfWriter
+    كما في pdfmeta.write_meta.
+    """
+    check_anchor(anchor)
+    xobj = qr_xobject(b64, vector)
+    out = BytesIO() if out is None else out
+    file.seek(0)
+    r = PdfReader(file)
+    if r.is_encrypted: raise ValueError("encrypted PDF")
+    if not r.pages: raise ValueError("PDF has no pages")
+    if incremental:
+        try:
+            with metrics.stages.time("pdf.stamp_incremental"):
+                w = PdfWriter(r, incremental=True)
+                page = w.pages[0]
+                _stamp_page(w, page, xobj, *position(page, anchor, margin_mm, size_mm), size_mm * MM)
+                w.write(out); out.seek(0); return out, "incremental"
+        except PyPdfError:
+            out.seek(0); out.truncate()
+    with metrics.stages.time("pdf.stamp_rewrite"):
+        w = PdfWriter(clone_from=r)
+        page = w.pages[0]
+        _stamp_page(w, page, xobj, *position(page, anchor, margin_mm, size_mm), size_mm * MM)
+        w.write(out); out.seek(0); return out, "rewrite"
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# ================= ملفات التصميم الثابتة (CSS/JS) بإصدارات =================
+# static/theme.css و static/theme.js تُخدَم كملفات ثابتة مرة واحدة ويخزّنها المتصفح؛
+# الصفحة تحقن فقط مرجعاً صغيراً ثابتاً فيه بصمة المحتوى (?v=) فيتغيّر الرابط عند
+# تعديل الملف وحده. الجذر الافتراضي هو مسار Streamlit (app/static، يتطلب
+# server.enableStaticServing)، ويمكن توجيهه إلى labelkit.server (/static) عبر
+# LABELKIT_STATIC_URL للحصول على Cache-Control طويل.
+import hashlib, os
+from functools import lru_cache
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+STATIC_ENV = "LABELKIT_STATIC_URL"
+ASSETS = ("theme.css", "theme.js")
+FONT_LINKS = (
+    "https://fonts.googleapis.com/css2?family=Cairo:wght@400;600;700&display=swap",
+    "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css",
+)
+
+@lru_cache(maxsize=None)
+def version(name: str) -> str:
+    with open(os.path.join(STATIC_DIR, name), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+def asset_url(name: str, base: str = None) -> str:
+    base = (base or os.environ.get(STATIC_ENV) or "app/static").rstrip("/")
+    return f"{base}/{name}?v={version(name)}"
+
+@lru_cache(maxsize=None)
+def head_html(base: str = None) -> str:
+    """المرجع الذي يُحقن في كل إعادة تشغيل (بضع مئات من البايتات بدل ~20 KB)."""
+    links = [f'<link rel="stylesheet" href="{u}">' for u in FONT_LINKS]
+    links.append(f'<link rel="stylesheet" href="{asset_url("theme.css", base)}">')
+    links.append(f'<script defer src="{asset_url("theme.js", base)}"></script>')
+    return "\n".join(links)
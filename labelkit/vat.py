@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# ================= حاسبة الضريبة الدقيقة (بالهللات) لأعمدة كاملة =================
+# كل المبالغ أعداد صحيحة بالهللة (1/100 ريال) والقسمة صحيحة مع تقريب نصف-لأعلى
+# (بعيداً عن الصفر) — نفس ROUND_HALF_UP في _fmt2، فالنتائج تطابق مبالغ QR بالهللة.
+import csv, io
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+
+import numpy as np
+
+RATE_SCALE = 10000  # النسبة المئوية بدقة 0.01% → 15% = 1500 من 10000
+FLOAT_DIGITS = 13   # أقصى أرقام صحيحة للمسار السريع: القيمة ×100 تبقى دون 2**53 فيمثّلها float بدقة
+
+def rate_units(rate_pct) -> int:
+    return int((Decimal(str(rate_pct)) * 100).to_integral_value(ROUND_HALF_UP))
+
+def to_halalas(x) -> int:
+    s = str(x).strip()
+    # المسار السريع لـ "123" و "123.4" و "-123.45" — بدون Decimal
+    whole, _, frac = s.partition(".")
+    digits = whole[1:] if whole[:1] in "-+" else whole
+    if digits.isdigit() and len(frac) <= 2 and (not frac or frac.isdigit()) and digits.isascii():
+        v = int(digits) * 100 + int(frac.ljust(2, "0") or 0)
+        return -v if whole[:1] == "-" else v
+    return int((Decimal(s) * 100).to_integral_value(ROUND_HALF_UP))
+
+def parse_amounts(values):
+    """(مصفوفة int64 بالهللات, [(موضع, القيمة)] للقيم غير الصالحة — تُحسب صفراً).
+
+    المسار السريع: تحويل العمود كاملاً إلى float دفعة واحدة؛ القيم ذات منزلتين
+    عشريتين أو أقل و FLOAT_DIGITS رقماً صحيحاً أو أقل تُمثَّل بدقة بعد ×100 والتقريب. ما عدا ذلك (وكل خلية فارغة أو غير
+    رقمية) يمر وحده عبر Decimal — لا يُسقط بقية الدفعة عن المسار السريع.
+    """
+    vals = [v.strip() if isinstance(v, str) else str(v) for v in values]
+    if not vals: return np.zeros(0, dtype=np.int64), []
+    a = np.array(vals, dtype=str)
+    dot = np.strings.find(a, ".")
+    frac = np.where(dot >= 0, np.strings.str_len(a) - dot - 1, 0)
+    # [+-]?أرقام ASCII مع نقطة واحدة على الأكثر: يُزال أول محرف إشارة (إن كان في البداية) وأول نقطة
+    body = np.strings.replace(a, ".", "", 1)
+    for sign in "-+":
+        body = np.where(np.strings.startswith(a, sign), np.strings.replace(body, sign, "", 1), body)
+    ascii_ = np.strings.str_len(np.strings.encode(a, "utf-8")) == np.strings.str_len(a)
+    simple = np.strings.isdecimal(body) & ascii_ & (frac <= 2) & (np.strings.str_len(body) - frac <= FLOAT_DIGITS)
+    out = np.zeros(len(vals), dtype=np.int64)
+    f = np.where(simple, a, "0").astype(np.float64)
+    out[simple] = np.rint(f[simple] * 100)
+    bad = []
+    for i in np.flatnonzero(~simple).tolist():
+        try: out[i] = to_halalas(vals[i])
+        except (InvalidOperation, ValueError, OverflowError):
+            out[i] = 0; bad.append((i, vals[i]))
+    return out, bad
+
+def split_halalas(totals: np.ndarray, rate_pct) -> tuple:
+    """(الصافي, الضريبة) بالهللات: net = round_half_up(total / (1 + rate))، vat = total - net."""
+    totals = np.asarray(totals, dtype=np.int64)
+    den = RATE_SCALE + rate_units(rate_pct)
+    mag = np.abs(totals)
+    # 2·mag·RATE_SCALE يفيض int64 بصمت فوق ≈ 4.6e14 هللة: تلك الأسطر (النادرة) بأعداد Python
+    big = (mag > (np.iinfo(np.int64).max - den) // (2 * RATE_SCALE)) | (mag < 0)
+    net = (2 * np.where(big, 0, mag) * RATE_SCALE + den) // (2 * den)
+    for i in np.flatnonzero(big).tolist():
+        net[i] = (2 * abs(int(totals[i])) * RATE_SCALE + den) // (2 * den)
+    net = np.where(totals < 0, -net, net)
+    return net, totals - net
+
+def format_halalas(a: np.ndarray) -> list:
+    a = np.asarray(a, dtype=np.int64)
+    mag = np.abs(a)
+    sign = np.where(a < 0, "-", "")
+    return [f"{s}{w}.{f:02d}" for s, w, f in zip(sign.tolist(), (mag // 100).tolist(), (mag % 100).tolist())]
+
+def split_one(total_incl, rate_pct) -> tuple:
+    net, vat = split_halalas(np.array([to_halalas(total_incl)]), rate_pct)
+    return int(net[0]) / 100, int(vat[0]) / 100
+
+def split_csv(fileobj, out, rate_pct, column: str = "", chunk: int = 200_000) -> dict:
+    """CSV فيه عمود مبالغ شاملة الضريبة → CSV بالأعمدة total,net,vat (+ الأعمدة الأصلية).
+
+    يعالج الملف على دفعات (chunk سطر) فالذاكرة ثابتة مهما كان عدد الأسطر.
+    """
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    stats = {"rows": 0, "invalid": 0, "total": 0, "net": 0, "vat": 0}
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None: return stats
+        col = header.index(column) if column in header else 0
+        w = csv.writer(out)
+        w.writerow(header + ["total_incl", "net", "vat", "error"])
+        while True:
+            rows = [r for _, r in zip(range(chunk), reader)]
+            if not rows: break
+            amounts, bad = parse_amounts(r[col] if col < len(r) else "" for r in rows)
+            net, vat = split_halalas(amounts, rate_pct)
+            bad_idx = {i for i, _ in bad}
+            for i, (r, t, n, v) in enumerate(zip(rows, format_halalas(amounts), format_halalas(net), format_halalas(vat))):
+                w.writerow(r + ([t, n, v, ""] if i not in bad_idx else ["", "", "", "invalid amount"]))
+            stats["rows"] += len(rows); stats["invalid"] += len(bad)
+            # المجاميع بأعداد Python: مجموع دفعة int64 قد يفيض بصمت مع مبالغ كبيرة
+            stats["total"] += sum(amounts.tolist()); stats["net"] += sum(net.tolist()); stats["vat"] += sum(vat.tolist())
+    finally:
+        text.detach()
+    return stats
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# ================= مخرجات متجهة وأوامر طابعات: SVG و PDF و ZPL =================
+# نفس الرموز (نفس وحدات Code128 ونفس مصفوفة QR) بدون نقطية: بضع مئات من البايتات
+# بدل عشرات الكيلوبايتات، وتُطبع بدقة الطابعة الأصلية دون إعادة تحجيم.
+#   svg  مسار واحد لكل رمز (الأشرطة/الوحدات المتجاورة مدموجة في مستطيل واحد)
+#   pdf  صفحة واحدة بمقاس الرمز، مستطيلات re/f في content stream مضغوط
+#   zpl  ^BC / ^BQ — الطابعة ترسم الرمز بنفسها
+import zlib
+
+import qrcode
+from qrcode.constants import ERROR_CORRECT_M
+
+from labelkit import code128 as c128, zatca
+
+FORMATS = {
+    "svg": ("image/svg+xml", ".svg"),
+    "pdf": ("application/pdf", ".pdf"),
+    "zpl": ("text/plain", ".zpl"),
+}
+QR_SIZE_IN = 1.0      # المقاس الفعلي لرمز QR في المخرجات المتجهة (شامل الهامش)
+PRINTER_DPI = 203     # دقة طابعات الملصقات الحرارية الشائعة (8 نقاط/مم)
+
+def _num(x: float) -> str:
+    return f"{x:.4f}".rstrip("0").rstrip(".")
+
+def _runs(row) -> list:
+    # [(بداية, طول)] لكل تتابع من الوحدات السوداء
+    out, start = [], None
+    for i, v in enumerate(row):
+        if v and start is None: start = i
+        elif not v and start is not None: out.append((start, i - start)); start = None
+    if start is not None: out.append((start, len(row) - start))
+    return out
+
+def _code128_geometry(height_in: float):
+    # نفس تقسيم render_png: الهامشان أعلى/أسفل والأشرطة بينهما (وحدات رأسية بالمم)
+    bar_mm = height_in * 25.4
+    return c128.MARGIN_MM, bar_mm, bar_mm + 2 * c128.MARGIN_MM
+
+# ================= SVG =================
+def _svg(width: str, height: str, vw, vh, path: str, aspect: str) -> bytes:
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {_num(vw)} {_num(vh)}" '
+            f'preserveAspectRatio="{aspect}" shape-rendering="crispEdges"><rect width="{_num(vw)}" height="{_num(vh)}" fill="#fff"/>'
+            f'{path}</svg>').encode("utf-8")
+
+def code128_svg(data: str, width_in: float = c128.WIDTH_IN, height_in: float = c128.HEIGHT_IN) -> bytes:
+    mods = c128.modules(data)
+    y0, bar, total = _code128_geometry(height_in)
+    d = "".join(f"M{x} {_num(y0)}h{n}v{_num(bar)}h-{n}z" for x, n in _runs(mods))
+    return _svg(f"{_num(width_in)}in", f"{_num(height_in)}in", len(mods), total, f'<path fill="#000" d="{d}"/>', "none")
+
+def qr_svg(m, size_in: float = QR_SIZE_IN) -> bytes:
+    # كل تتابع أفقي خط بسماكة وحدة واحدة على منتصف الصف — نصف حجم المستطيلات المغلقة
+    d = "".join(f"M{x} {y}.5h{n}" for y, row in enumerate(m.tolist()) for x, n in _runs(row))
+    return _svg(f"{_num(size_in)}in", f"{_num(size_in)}in", m.shape[1], m.shape[0],
+                f'<path stroke="#000" stroke-width="1" d="{d}"/>', "xMidYMid meet")
+
+# ================= PDF =================
+def _pdf_page(width_pt: float, height_pt: float, content: bytes) -> bytes:
+    stream = zlib.compress(content, 9)
+    objs = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %s %s] /Contents 4 0 R /Resources << >> >>"
+        % (_num(width_pt).encode(), _num(height_pt).encode()),
+        b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objs, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    return bytes(out)
+
+def _rects(width_pt, height_pt, units_w, units_h, rects) -> bytes:
+    # مصفوفة cm تحوّل وحدات الرمز (الأصل أعلى اليسار) إلى نقاط PDF (الأصل أسفل اليسار)
+    sx, sy = width_pt / units_w, height_pt / units_h
+    body = " ".join(f"{_num(x)} {_num(y)} {_num(w)} {_num(h)} re" for x, y, w, h in rects)
+    return f"q {_num(sx)} 0 0 {_num(-sy)} 0 {_num(height_pt)} cm 0 g {body} f Q".encode("ascii")
+
+def code128_pdf(data: str, width_in: float = c128.WIDTH_IN, height_in: float = c128.HEIGHT_IN) -> bytes:
+    mods = c128.modules(data)
+    y0, bar, total = _code128_geometry(height_in)
+    w, h = width_in * 72, height_in * 72
+    return _pdf_page(w, h, _rects(w, h, len(mods), total, [(x, y0, n, bar) for x, n in _runs(mods)]))
+
+def qr_pdf(m, size_in: float = QR_SIZE_IN) -> bytes:
+    s = size_in * 72
+    rects = [(x, y, n, 1) for y, row in enumerate(m.tolist()) for x, n in _runs(row)]
+    return _pdf_page(s, s, _rects(s, s, m.shape[1], m.shape[0], rects))
+
+# ================= ZPL =================
+def _zpl_field(s: str) -> str:
+    # ^FH: كل حرف خاص (^ ~ _ وغير القابل للطباعة) يُكتب _XX بالست عشري
+    return "".join(f"_{ord(ch):02X}" if ch in "^~_" or not 32 <= ord(ch) < 127 else ch for ch in s)
+
+def code128_zpl(data: str, width_in: float = c128.WIDTH_IN, height_in: float = c128.HEIGHT_IN, dpi: int = PRINTER_DPI) -> bytes:
+    n = len(c128.modules(data))
+    y0, bar, total = _code128_geometry(height_in)
+    dots = height_in * dpi / total  # نقاط لكل مم من الارتفاع الكلي
+    module = max(1, int(width_in * dpi) // n)  # تقريب لأسفل: الرمز لا يتجاوز ^PW أبداً
+    return (f"^XA^PW{round(width_in * dpi)}^FO0,{round(y0 * dots)}^BY{module}"
+            f"^BCN,{max(1, round(bar * dots))},N,N,N,A^FH^FD{_zpl_field(data)}^FS^XZ").encode("ascii")
+
+def qr_zpl(b64: str, size_in: float = QR_SIZE_IN, dpi: int = PRINTER_DPI) -> bytes:
+    # MA, = تصحيح أخطاء M (مثل ERROR_CORRECT_M) وإدخال تلقائي. الطابعة تختار أصغر إصدار
+    # يتسع للحمولة، فالتكبير يُحسب من ذلك الإصدار (مع الهامش) لا من QR_VERSION
+    qr = qrcode.QRCode(error_correction=ERROR_CORRECT_M); qr.add_data(b64)
+    version = qr.best_fit()  # الإصدار فقط، بدون بناء المصفوفة واختيار القناع
+    mag = min(10, max(1, round(size_in * dpi / zatca.qr_modules(version))))
+    return f"^XA^FO0,0^BQN,2,{mag}^FH^FDMA,{_zpl_field(b64)}^FS^XZ".encode("ascii")
+
+# ================= نقطة دخول موحّدة =================
+def code128(data: str, fmt: str, width_in: float = c128.WIDTH_IN, height_in: float = c128.HEIGHT_IN) -> bytes:
+    if fmt == "svg": return code128_svg(data, width_in, height_in)
+    if fmt == "pdf": return code128_pdf(data, width_in, height_in)
+    if fmt == "zpl": return code128_zpl(data, width_in, height_in)
+    raise ValueError(f"unknown vector format {fmt!r}")
+
+def qr(b64: str, fmt: str, m=None) -> bytes:
+    # m: مصفوفة QR جاهزة (اختياري) لتفادي بنائها مرتين
+    if fmt == "zpl": return qr_zpl(b64)
+    m = zatca.qr_matrix(b64) if m is None else m
+    if fmt == "svg": return qr_svg(m)
+    if fmt == "pdf": return qr_pdf(m)
+    raise ValueError(f"unknown vector format {fmt!r}")
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# ================= فك TLV والتحقق الجماعي من حمولات ZATCA =================
+# عكس build_zatca_base64: يتحقق من الوسوم 1..5 وأطوالها وترميز UTF-8، ومن أن كل
+# قيمة بالصيغة التي يُنتجها المولّد (_clean_vat / _fmt2 / _iso_utc).
+#   python -m labelkit.verify payloads.txt [--workers 4] [-o mismatches.jsonl]
+import argparse, base64, binascii, json, re, sys
+from datetime import datetime
+
+from labelkit import bulk
+from labelkit.zatca import _clean_vat, _fmt2
+
+TAGS = {1: "seller", 2: "vat_number", 3: "timestamp", 4: "total", 5: "vat"}
+_ISO = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z")
+_AMOUNT = re.compile(r"-?\d+\.\d{2}")
+
+def decode_tlv(b64: str) -> list:
+    """[(tag, bytes)] بالترتيب كما في الحمولة؛ ValueError إذا كان الترميز أو البنية تالفة."""
+    try: raw = base64.b64decode(b64.strip(), validate=True)
+    except (binascii.Error, ValueError) as e: raise ValueError(f"base64: {e}") from None
+    out, i = [], 0
+    while i < len(raw):
+        if i + 2 > len(raw): raise ValueError(f"truncated TLV header at byte {i}")
+        tag, n = raw[i], raw[i + 1]
+        if i + 2 + n > len(raw): raise ValueError(f"tag {tag}: length {n} exceeds payload")
+        out.append((tag, raw[i + 2:i + 2 + n])); i += 2 + n
+    return out
+
+def check_payload(b64: str) -> list:
+    """قائمة بكل المخالفات في الحمولة (فارغة = سليمة)."""
+    try: fields = decode_tlv(b64)
+    except ValueError as e: return [str(e)]
+    issues, vals = [], {}
+    tags = [t for t, _ in fields]
+    if tags != [1, 2, 3, 4, 5]:
+        extra = sorted(set(tags) - set(TAGS)); missing = sorted(set(TAGS) - set(tags))
+        if extra: issues.append(f"unexpected tags {extra}")
+        if missing: issues.append(f"missing tags {missing}")
+        if len(tags) != len(set(tags)): issues.append("duplicate tags")
+        if not extra and not missing and len(tags) == len(set(tags)): issues.append(f"tags out of order {tags}")
+    for tag, b in fields:
+        if tag not in TAGS: continue
+        try: vals[tag] = b.decode("utf-8")
+        except UnicodeDecodeError: issues.append(f"tag {tag}: invalid UTF-8")
+    v = vals.get(2)
+    if v is not None and (v != _clean_vat(v) or len(v) != 15):
+        issues.append(f"vat_number {v!r}: expected 15 digits")
+    ts = vals.get(3)
+    if ts is not None:
+        try:
+            if not _ISO.fullmatch(ts): raise ValueError
+            datetime.fromisoformat(ts[:-1])  # يتحقق من صحة التاريخ نفسه (بدون strptime البطيء)
+        except ValueError: issues.append(f"timestamp {ts!r}: expected YYYY-MM-DDTHH:MM:SSZ")
+    for tag in (4, 5):
+        a = vals.get(tag)
+        if a is not None and (not _AMOUNT.fullmatch(a) or _fmt2(a) != a):
+            issues.append(f"{TAGS[tag]} {a!r}: expected amount with 2 decimals")
+    if not issues and vals.get(4) is not None and vals.get(5) is not None and float(vals[5]) > float(vals[4]):
+        issues.append(f"vat {vals[5]} exceeds total {vals[4]}")
+    return issues
+
+def decode_payload(b64: str) -> dict:
+    # قاموس مقروء {seller, vat_number, ...} من حمولة سليمة
+    return {TAGS.get(t, str(t)): b.decode("utf-8", "replace") for t, b in decode_tlv(b64)}
+
+def _check_job(item):
+    return check_payload(item[1])
+
+def verify_lines(lines, workers: int = 1):
+    """(رقم السطر, الحمولة, المخالفات) لكل سطر غير فارغ — بالترتيب عند workers=1."""
+    items = ((n, s.strip()) for n, s in enumerate(lines, start=1) if s.strip())
+    for (n, s), issues, err in bulk.imap_bounded(_check_job, items, workers, chunksize=2048):
+        yield n, s, issues if err is None else [err]
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m labelkit.verify", description="Verify ZATCA TLV base64 payloads (one per line)")
+    ap.add_argument("inputs", nargs="*", default=["-"])
+    ap.add_argument("-o", "--output", default="-", help="مخرجات JSONL للحمولات المخالفة فقط")
+    ap.add_argument("--workers", type=int, default=1)
+    args = ap.parse_args(argv)
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    total = bad = 0
+    try:
+        for path in args.inputs:
+            src = sys.stdin if path == "-" else open(path, encoding="utf-8-sig")
+            try:
+                for n, s, issues in verify_lines(src, args.workers):
+                    total += 1
+                    if issues:
+                        bad += 1
+                        dst.write(json.dumps({"file": path, "line": n, "payload": s, "issues": issues}, ensure_ascii=False) + "\n")
+            finally:
+                if src is not sys.stdin: src.close()
+    finally:
+        if dst is not sys.stdout: dst.close()
+    print(f"checked {total}, mismatches {bad}", file=sys.stderr)
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# ================= ZATCA: TLV + QR =================
+import re, base64
+from io import BytesIO
+from datetime import datetime, date, time, timezone
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+
+import numpy as np
+import qrcode
+from qrcode.constants import ERROR_CORRECT_M
+from PIL import Image
+
+from labelkit import cache, metrics, raster, vat
+
+# ================= أدوات مشتركة =================
+def _clean_vat(v: str) -> str: return re.sub(r"\D", "", v or "")
+
+def _fmt2(x: str) -> str:
+    try: q = Decimal(x)
+    except InvalidOperation: q = Decimal("0")
+    return format(q.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP), "f")
+
+def _iso_utc(d: date, t: time) -> str:
+    with metrics.stages.time("zatca.iso_utc"):
+        local_dt = datetime.combine(d, t.replace(microsecond=0))
+        try:
+            return local_dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        except Exception:
+            return local_dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _tlv(tag: int, val: str) -> bytes:
+    b = val.encode("utf-8")
+    if len(b) > 255: raise ValueError("TLV>255B")
+    return bytes([tag, len(b)]) + b
+
+def split_vat(total_incl: float, rate_pct: float):
+    # (قبل الضريبة, الضريبة) من مبلغ شامل الضريبة ونسبة مئوية — بالهللات ونصف-لأعلى مثل _fmt2
+    if not total_incl or not rate_pct: return 0.0, 0.0
+    return vat.split_one(total_incl, rate_pct)
+
+def build_zatca_base64(seller, vat, dt_iso, total, vat_s):
+    with metrics.stages.time("zatca.tlv"):
+        payload = b"".join([_tlv(1,seller), _tlv(2,vat), _tlv(3,dt_iso), _tlv(4,total), _tlv(5,vat_s)])
+        return base64.b64encode(payload).decode("ascii")
+
+# ================= QR (صورة كثيفة) =================
+QR_VERSION, QR_BORDER, QR_PX = 14, 4, 640
+
+def qr_matrix(b64: str) -> np.ndarray:
+    # مصفوفة الوحدات (True = أسود) شاملة الهامش
+    with metrics.stages.time("qr.make"):
+        qr = qrcode.QRCode(version=QR_VERSION, error_correction=ERROR_CORRECT_M, border=QR_BORDER)
+        qr.add_data(b64); qr.make(fit=False)
+        return np.array(qr.get_matrix(), dtype=bool)
+
+def check_capacity(b64: str) -> str:
+    """ValueError إن لم تتسع الحمولة في QR_VERSION — فحص السعة وحده بدون اختيار القناع."""
+    # نفس تقسيم add_data ونفس عدّ البتات في qrcode.util.create_data، بدون ترميز Reed-Solomon
+    qr = qrcode.QRCode(version=QR_VERSION, error_correction=ERROR_CORRECT_M)
+    qr.add_data(b64)
+    buf = qrcode.util.BitBuffer()
+    for data in qr.data_list:
+        buf.put(data.mode, 4); buf.put(len(data), qrcode.util.length_in_bits(data.mode, QR_VERSION)); data.write(buf)
+    limit = sum(b.data_count * 8 for b in qrcode.base.rs_blocks(QR_VERSION, ERROR_CORRECT_M))
+    if len(buf) > limit: raise ValueError(f"payload too long for QR version {QR_VERSION}: {len(buf)} > {limit} bits")
+    return b64
+
+def _nearest_index(n: int, size: int) -> np.ndarray:
+    # نفس أخذ العينات من مركز البكسل في Image.NEAREST
+    return (2 * np.arange(size) + 1) * n // (2 * size)
+
+def matrix_image(m: np.ndarray, size: int = QR_PX) -> Image.Image:
+    # يحل محل مرحلتي التحويل إلى RGB والتكبير إلى 640px في المسار القديم
+    with metrics.stages.time("qr.image"):
+        idx = _nearest_index(m.shape[0], size)
+        white = ~m[np.ix_(idx, idx)]
+        return Image.frombytes("1", (size, size), np.packbits(white, axis=1).tobytes())
+
+def matrix_png(m: np.ndarray, size: int = QR_PX, fmt: str = raster.DEFAULT_FORMAT, zlib_level: int = raster.ZLIB_LEVEL) -> bytes:
+    im = matrix_image(m, size)
+    with metrics.stages.time("qr.png"):
+        return raster.encode(im, fmt, zlib_level)
+
+def make_qr(b64: str, fmt: str = raster.DEFAULT_FORMAT, zlib_level: int = raster.ZLIB_LEVEL) -> bytes:
+    # المصفوفة → 640×640 مباشرة بعمليات المصفوفات، ثم صورة أحادية البت (fmt: png | png-palette | tiff-g4)
+    return matrix_png(qr_matrix(b64), fmt=fmt, zlib_level=zlib_level)
+
+# ================= تحقق عكسي من صورة QR (بدون قارئ QR) =================
+def qr_modules(version: int = QR_VERSION, border: int = QR_BORDER) -> int:
+    return 17 + 4 * version + 2 * border
+
+def sample_modules(png: bytes, n: int = None) -> np.ndarray:
+    """يعيد شبكة الوحدات (True = أسود) بأخذ بكسل مركز كل وحدة من الصورة المرسومة."""
+    n = n or qr_modules()
+    with Image.open(BytesIO(png)) as im:
+        a = np.asarray(im.convert("L"))
+    h, w = a.shape
+    ys = ((np.arange(n) + 0.5) * h / n).astype(int)
+    xs = ((np.arange(n) + 0.5) * w / n).astype(int)
+    return a[np.ix_(ys, xs)] < 128
+
+def verify_qr_png(png: bytes, expected) -> int:
+    """عدد الوحدات المختلفة بين الصورة والمصفوفة المتوقعة (expected: حمولة base64 أو مصفوفة)؛ 0 = مطابقة تامة."""
+    m = qr_matrix(expected) if isinstance(expected, str) else expected
+    grid = sample_modules(png, m.shape[0])
+    return int(np.count_nonzero(grid != m))
+
+def render_qr(b64: str, fmt: str = raster.DEFAULT_FORMAT) -> bytes:
+    return cache.images.get_or_render("qr", b64, lambda s: make_qr(s, fmt), (QR_VERSION, QR_BORDER, QR_PX, fmt))
+
+# ================= سجل الفواتير (ledger) =================
+# أسماء الأعمدة المقبولة لكل حقل
+LEDGER_FIELDS = {
+    "seller":     ("seller", "seller_name", "البائع", "اسم البائع"),
+    "vat_number": ("vat_number", "vat_no", "vat_id", "الرقم الضريبي"),
+    "timestamp":  ("timestamp", "datetime", "date", "التاريخ"),
+    "total":      ("total", "total_incl", "الإجمالي"),
+    "vat":        ("vat", "vat_amount", "tax", "الضريبة"),
+    "invoice":    ("invoice", "invoice_no", "invoice_id", "رقم الفاتورة"),
+}
+_TS_FORMATS = ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y, %H:%M:%S", "%d/%m/%Y %H:%M:%S")
+
+def _field(rec: dict, name: str) -> str:
+    for k in LEDGER_FIELDS[name]:
+        if k in rec and rec[k] is not None: return str(rec[k]).strip()
+    return ""
+
+def parse_timestamp(s: str) -> str:
+    """ISO UTC كما يُنتجه _iso_utc. القيم المنتهية بـ Z تُعامل كـ UTC، وغيرها كوقت محلي."""
+    s = (s or "").strip()
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z", s):
+        datetime.strptime(s, "%Y-%m-%dT%H:%M:%SZ")
+        return s
+    for fmt in _TS_FORMATS:
+        try: dt = datetime.strptime(s, fmt)
+        except ValueError: continue
+        return _iso_utc(dt.date(), dt.time())
+    raise ValueError(f"صيغة التاريخ غير معروفة: {s!r}")
+
+def _amount(x: str) -> str:
+    try: Decimal(x)
+    except InvalidOperation: raise ValueError(f"مبلغ غير صالح: {x!r}") from None
+    return _fmt2(x)
+
+def ledger_payload(rec: dict) -> str:
+    """يبني حمولة ZATCA (base64) لسطر واحد من سجل الفواتير أو يرفع ValueError."""
+    vat = _clean_vat(_field(rec, "vat_number"))
+    if len(vat) != 15: raise ValueError("الرقم الضريبي يجب أن يكون 15 رقمًا.")
+    return build_zatca_base64(
+        _field(rec, "seller"),
+        vat,
+        parse_timestamp(_field(rec, "timestamp")),
+        _amount(_field(rec, "total")),
+        _amount(_field(rec, "vat")),
+    )
@@ -0,0 +1,78 @@
+// تحريك شريط التقدم
+document.addEventListener('DOMContentLoaded', function() {
+    const progressBar = document.getElementById('progressBar');
+    if (progressBar) {
+        setTimeout(() => {
+            progressBar.style.width = '100%';
+        }, 500);
+    }
+
+    // تأثير الظهور عند التمرير
+    const observerOptions = {
+        root: null,
+        rootMargin: '0px',
+        threshold: 0.1
+    };
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.style.opacity = 1;
+                entry.target.style.transform = 'translateY(0)';
+            }
+        });
+    }, observerOptions);
+
+    document.querySelectorAll('.card').forEach(card => {
+        card.style.opacity = 0;
+        card.style.transform = 'translateY(20px)';
+        card.style.transition = 'opacity 0.6s ease, transform 0.6s ease';
+        observer.observe(card);
+    });
+
+    // تأثير النبض للأيقونات
+    document.querySelectorAll('.pulse-glow').forEach(icon => {
+        setInterval(() => {
+            icon.style.boxShadow = '0 0 ' + (Math.random() * 20 + 20) + 'px rgba(255, 255, 255, ' + (Math.random() * 0.3 + 0.3) + ')';
+        }, 2000);
+    });
+
+    // تغيير لون الرقم الضريبي للأخضر عند بلوغ 15 رقم ومنع الإدخال بعد ذلك
+    const vatInputs = document.querySelectorAll('input[data-testid="stTextInput"]');
+    vatInputs.forEach(input => {
+        if (input.placeholder && input.placeholder.includes('الرقم الضريبي')) {
+            // منع إدخال غير الأرقام
+            input.addEventListener('input', function(e) {
+                // السماح فقط بالأرقام
+                this.value = this.value.replace(/\D/g, '');
+
+                // منع الإدخال بعد 15 رقم
+                if (this.value.length > 15) {
+                    this.value = this.value.substring(0, 15);
+                }
+
+                // تغيير اللون عند الوصول لـ 15 رقم
+                if (this.value.length === 15) {
+                    this.classList.add('vat-valid');
+                } else {
+                    this.classList.remove('vat-valid');
+                }
+            });
+
+            // منع اللصق إذا كان يحتوي على غير أرقام أو أكثر من 15 رقم
+            input.addEventListener('paste', function(e) {
+                e.preventDefault();
+                const pastedData = e.clipboardData.getData('text');
+                const cleanData = pastedData.replace(/\D/g, '').substring(0, 15);
+                this.value = cleanData;
+
+                // تغيير اللون عند الوصول لـ 15 رقم
+                if (this.value.length === 15) {
+                    this.classList.add('vat-valid');
+                } else {
+                    this.classList.remove('vat-valid');
+                }
+            });
+        }
+    });
+});
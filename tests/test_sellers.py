@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from labelkit.sellers import SellerRegistry
+
+def registry(tmp_path, *pairs):
+    r = SellerRegistry(str(tmp_path / "sellers.db"))
+    r.put_many(pairs)
+    return r
+
+def test_article_in_name_not_in_query(tmp_path):
+    r = registry(tmp_path, ("300000000000003", "مؤسسة الأمل التجارية"), ("399999999999993", "شركة الإتقان"))
+    assert r.search("اتقان") == [("399999999999993", "شركة الإتقان")]
+    assert r.search("الامل تجاريه") == [("300000000000003", "مؤسسة الأمل التجارية")]
+
+def test_article_in_query_not_in_name(tmp_path):
+    r = registry(tmp_path, ("399999999999993", "اتقان للمقاولات"))
+    assert r.search("الاتقان") == [("399999999999993", "اتقان للمقاولات")]
+    assert r.search("الإتقان للمقا") == [("399999999999993", "اتقان للمقاولات")]
+
+def test_index_follows_renames(tmp_path):
+    r = registry(tmp_path, ("399999999999993", "شركة الإتقان"))
+    r.put("399999999999993", "شركة النور")
+    assert r.search("اتقان") == []
+    assert r.search("النور") == [("399999999999993", "شركة النور")]
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+import io
+
+from labelkit.vat import format_halalas, parse_amounts, split_csv, split_halalas, to_halalas
+
+def test_split_large_totals_does_not_overflow():
+    total = to_halalas("5000000000000")
+    net, vat = split_halalas([total, -total], 15)
+    assert format_halalas(net) == ["4347826086956.52", "-4347826086956.52"]
+    assert format_halalas(vat) == ["652173913043.48", "-652173913043.48"]
+
+def test_split_csv_totals_beyond_int64_sum():
+    src = io.BytesIO(("amount\n" + "50000000000000000\n" * 300).encode())
+    stats = split_csv(src, io.StringIO(), 15)
+    assert stats["invalid"] == 0
+    assert stats["total"] == 300 * 5 * 10**18
+    assert stats["net"] + stats["vat"] == stats["total"]
+
+def test_parse_amounts_exact_past_float_precision():
+    vals = ["999999999999999", "9999999999999.99", "-99999999999999.99", "12345678901234567.89", "0.29", ""]
+    out, bad = parse_amounts(vals)
+    assert out.tolist() == [99999999999999900, 999999999999999, -9999999999999999, 1234567890123456789, 29, 0]
+    assert bad == [(5, "")]